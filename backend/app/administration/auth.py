@@ -1,5 +1,5 @@
 from app.models.db import User
-from app.administration.security import hash_password, verify_password
+from app.administration.security import hash_password, verify_and_update_password
 import uuid
 
 def register_user(db, username: str, password: str, role: str):
@@ -25,7 +25,14 @@ def authenticate_user(db, username: str, password: str):
     if not user:
         return None
 
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = verify_and_update_password(password, user.password_hash)
+
+    if not valid:
         return None
 
+    # Stored hash predates the current argon2 parameters
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+
     return user
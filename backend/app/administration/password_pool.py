@@ -0,0 +1,115 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from fastapi import HTTPException
+from app.services.stats import LatencyStats
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordPool:
+    """Runs argon2 hash/verify calls on a small dedicated process pool.
+
+    Argon2 is CPU- and memory-hard on purpose, so a burst of logins would
+    otherwise occupy request threads and the GIL. At most `max_pending` calls
+    may be queued or running; beyond that callers get a 429 with Retry-After
+    instead of waiting. With `workers=0` calls run inline, still bounded by
+    `max_pending`.
+
+    Latencies are recorded per operation both end to end ("verify") and as
+    time spent hashing in the worker ("verify.cpu"); the difference is queueing.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout_seconds: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+
+        self.rejected = 0
+        self.timeouts = 0
+        self.latency = LatencyStats()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs the event loop and
+                # thread pools is not safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _busy(self):
+        return HTTPException(
+            status_code=429,
+            detail="Too many sign-in attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+
+    def run(self, operation: str, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                self.latency.route("rejected")
+                raise self._busy()
+            self._pending += 1
+
+        start = time.perf_counter()
+
+        try:
+            if self.workers > 0:
+                future = self._pool().submit(_timed, fn, *args)
+                try:
+                    result, cpu_seconds = future.result(timeout=self.timeout_seconds)
+                except FutureTimeout:
+                    future.cancel()
+                    with self._lock:
+                        self.timeouts += 1
+                    raise self._busy()
+            else:
+                result, cpu_seconds = _timed(fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        self.latency.observe(operation, time.perf_counter() - start)
+        self.latency.observe(f"{operation}.cpu", cpu_seconds)
+        self.latency.route(operation)
+
+        return result
+
+    def warm_up(self):
+        """Start the worker processes now rather than on the first login"""
+
+        if self.workers > 0:
+            pool = self._pool()
+            for future in [pool.submit(time.perf_counter) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        latency = self.latency.stats()
+        return {
+            "workers": self.workers,
+            "maxPending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "calls": latency["routes"],
+            "latency": latency["stages"],
+        }
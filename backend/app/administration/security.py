@@ -1,10 +1,23 @@
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
-import uuid
+from app.config import Config
+from app.administration.password_pool import PasswordPool
 import os
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=Config.ARGON2_TIME_COST,
+    argon2__memory_cost=Config.ARGON2_MEMORY_COST_KIB,
+    argon2__parallelism=Config.ARGON2_PARALLELISM,
+)
+
+password_pool = PasswordPool(
+    workers=Config.PASSWORD_POOL_WORKERS,
+    max_pending=Config.PASSWORD_POOL_MAX_PENDING,
+    timeout_seconds=Config.PASSWORD_POOL_TIMEOUT_SECONDS,
+)
 
 
 SECRET_KEY = os.getenv("JWT_SECRET", "dev-secret")
@@ -12,12 +25,27 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 
-def hash_password(password: str) -> str:
+# Run inside the pool's worker processes
+def _hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _verify_and_update(password: str, hashed: str):
+    return pwd_context.verify_and_update(password, hashed)
+
+
+def hash_password(password: str) -> str:
+    return password_pool.run("hash", _hash, password)
+
+
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return verify_and_update_password(password, hashed)[0]
+
+
+def verify_and_update_password(password: str, hashed: str):
+    """(valid, new hash or None); a new hash is returned when the stored one
+    was made with different argon2 parameters"""
+    return password_pool.run("verify", _verify_and_update, password, hashed)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
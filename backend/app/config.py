@@ -14,7 +14,79 @@ class Config:
     OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
     GROQ_API_KEY=os.getenv("GROQ_API_KEY")
     HF_TOKEN=os.getenv("HF_TOKEN")
+    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
     # Vector database configuration
     CONNECTION_PG_DB = os.getenv("CONNECTION_PG_DB")
+    # Optional override; otherwise CONNECTION_PG_DB is reused with the asyncpg driver
+    CONNECTION_PG_DB_ASYNC = os.getenv("CONNECTION_PG_DB_ASYNC")
     CONNECTION_PG_VECTORDB = os.getenv("CONNECTION_PG_VECTORDB")
-    CONNECTION_NAME = os.getenv("CONNECTION_NAME")
\ No newline at end of file
+    CONNECTION_NAME = os.getenv("CONNECTION_NAME")
+    # Retrieval backends: "openai" | "local" embeddings, "pgvector" | "memory" index
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pgvector").lower()
+    LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "512"))
+    # Persistent embedding cache (memory-mapped, keyed on content hash)
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_DIR = os.getenv(
+        "EMBEDDING_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".embedding_cache"),
+    )
+    EMBEDDING_CACHE_MAX_QUERIES = int(os.getenv("EMBEDDING_CACHE_MAX_QUERIES", "50000"))
+    EMBEDDING_CACHE_READONLY = os.getenv("EMBEDDING_CACHE_READONLY", "false").lower() == "true"
+    # KB chunking: markdown sections are kept whole up to this many characters
+    KB_CHUNK_SIZE = int(os.getenv("KB_CHUNK_SIZE", "1000"))
+    KB_CHUNK_OVERLAP = int(os.getenv("KB_CHUNK_OVERLAP", "100"))
+    # Chunked KB snapshot, read by every process after the first instead of re-parsing
+    KB_SNAPSHOT_ENABLED = os.getenv("KB_SNAPSHOT_ENABLED", "true").lower() == "true"
+    KB_SNAPSHOT_PATH = os.getenv(
+        "KB_SNAPSHOT_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".kb_snapshot", "chunks.snapshot"),
+    )
+    # Retrieval: "auto" | "hybrid" | "vector" | "lexical" (see services/retrieval.py)
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "auto").lower()
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "3"))
+    RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "10"))
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    # Ranked chunk ids per normalized query, dropped when the KB version changes
+    RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() == "true"
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "4096"))
+    RETRIEVAL_CACHE_DROP_STOPWORDS = os.getenv("RETRIEVAL_CACHE_DROP_STOPWORDS", "false").lower() == "true"
+    # Retrieved context sent to the LLM: token budget (LLM_MODEL's tiktoken encoding) and the
+    # share of a chunk's word shingles already sent above which it counts as a near-duplicate
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+    CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.85"))
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1024"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    # Background refresh interval for the KB version that keys the caches
+    KB_VERSION_CHECK_SECONDS = float(os.getenv("KB_VERSION_CHECK_SECONDS", "30"))
+    # Longest pause between service warm-up retries (doubles from 1s after each failure)
+    WARM_UP_RETRY_MAX_SECONDS = float(os.getenv("WARM_UP_RETRY_MAX_SECONDS", "60"))
+    # Per-session chat history kept in process (0 sessions disables it)
+    HISTORY_CACHE_SESSIONS = int(os.getenv("HISTORY_CACHE_SESSIONS", "2048"))
+    HISTORY_CACHE_DEPTH = int(os.getenv("HISTORY_CACHE_DEPTH", "10"))
+    HISTORY_CACHE_TTL_SECONDS = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "300"))
+    # Rules-first classification: "on" skips classify_chain when rules are decisive,
+    # "shadow" always calls the LLM and records agreement, "off" disables the rules
+    CLASSIFIER_FAST_PATH = os.getenv("CLASSIFIER_FAST_PATH", "on").lower()
+    FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.85"))
+    # Identical in-flight rag_chain / classify_chain calls share one LLM call; a caller
+    # beyond the per-key waiter limit, or one that waited too long, makes its own
+    SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    SINGLE_FLIGHT_MAX_WAITERS = int(os.getenv("SINGLE_FLIGHT_MAX_WAITERS", "64"))
+    SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "30"))
+    # Password hashing: argon2id cost parameters (new hashes and rehash on login)
+    # and the process pool that runs them; 0 workers hashes inline
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST_KIB = int(os.getenv("ARGON2_MEMORY_COST_KIB", "65536"))
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+    PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+    PASSWORD_POOL_MAX_PENDING = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "16"))
+    PASSWORD_POOL_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_POOL_TIMEOUT_SECONDS", "10"))
+    # Serve /api/metrics/summary from the metrics_daily rollup instead of scanning base tables
+    METRICS_ROLLUP_ENABLED = os.getenv("METRICS_ROLLUP_ENABLED", "true").lower() == "true"
+    # /api/metrics/trends: today's bucket is recomputed after this many seconds; past days are kept
+    TRENDS_TODAY_TTL_SECONDS = float(os.getenv("TRENDS_TODAY_TTL_SECONDS", "30"))
+    TRENDS_MAX_DAYS = int(os.getenv("TRENDS_MAX_DAYS", "366"))
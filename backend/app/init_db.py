@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 from app.config import Config
@@ -18,5 +20,28 @@ def get_db():
         db.close()
 
 
+def async_database_url(url: str):
+    """Same database through asyncpg; libpq's sslmode becomes asyncpg's ssl"""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+
+    return url
+
+
+async_engine = create_async_engine(
+    Config.CONNECTION_PG_DB_ASYNC or async_database_url(database_url),
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+
+asyncSessionLocal = async_sessionmaker(autoflush=False,expire_on_commit=False,bind=async_engine)
+
+async def get_async_db():
+    async with asyncSessionLocal() as db:
+        yield db
+
+
 Base = declarative_base()
 
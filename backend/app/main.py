@@ -1,15 +1,34 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 from app.routes import chat,tickets,metrics,auth
 from app.init_db import engine, Base
+from app.migrations import run_migrations
+from app.services.container import services
+from app.administration.security import password_pool
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    # Also backfills metrics_daily on first deploy, once, under the migration lock
+    run_migrations(engine)
+
+    # Warm clients in the background so the port opens immediately; /health reports readiness.
+    # Failed attempts are retried with backoff, so a dependency that starts late is picked up
+    warm_up = asyncio.create_task(services.warm_up_until_ready())
+    pool_warm_up = asyncio.create_task(asyncio.to_thread(password_pool.warm_up))
+    # Requests only read the cached KB version; the query behind it runs off the loop
+    kb_version_refresh = asyncio.create_task(services.refresh_kb_version_periodically())
 
     yield
 
+    warm_up.cancel()
+    pool_warm_up.cancel()
+    kb_version_refresh.cancel()
+    password_pool.shutdown()
+
 app = FastAPI(lifespan=lifespan)
 
 origins = [
@@ -24,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],
 )
 
 app.include_router(auth.router)
@@ -42,4 +62,9 @@ async def health():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    status = services.status()
+
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming", **status})
+
+    return {"status": "healthy", **status}
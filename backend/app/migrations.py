@@ -0,0 +1,159 @@
+import argparse
+import logging
+import re
+import time
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_rollup(conn):
+    # A no-op once metrics_daily has rows, so a retried step does not double them
+    from app.services.rollup import ensure_rollup
+    ensure_rollup(conn)
+
+
+# Versioned schema changes applied after Base.metadata.create_all.
+# Append new entries; never edit or renumber one that has shipped.
+# Each statement runs in autocommit so indexes can be built CONCURRENTLY,
+# without write-locking a populated table during a deploy, so every
+# statement must be idempotent (IF [NOT] EXISTS). A step may also be a
+# function of the connection, for data changes that need Python.
+MIGRATIONS = [
+    (
+        1,
+        "Hot-path composite and expression indexes",
+        [
+            # find_existing_ticket: open ticket for a session with this severity and category
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_open_lookup "
+            "ON tickets (session_id, status, severity, (ai_results->>'category'))",
+            # load_chat_history: latest messages of one session
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_session_created "
+            "ON chat_messages (session_id, created_at DESC)",
+            # metrics trends and rollup rebuild: created_at >= since
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_created_at ON tickets (created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_created_at ON chat_messages (created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_guardrail_events_created_at ON guardrail_events (created_at)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_sessions_created_at ON chat_sessions (created_at)",
+        ],
+    ),
+    (
+        2,
+        "Keyset pagination indexes for GET /api/tickets",
+        [
+            # (created_at, id) also serves created_at range scans, so it replaces the single-column index
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_created_id ON tickets (created_at, id)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_updated_id ON tickets (updated_at, id)",
+            "DROP INDEX CONCURRENTLY IF EXISTS ix_tickets_created_at",
+        ],
+    ),
+    (
+        3,
+        "Backfill the metrics_daily rollup from existing rows",
+        [backfill_rollup],
+    ),
+]
+
+# Serialises workers that start at the same time
+MIGRATION_LOCK_KEY = 715_201_401
+MIGRATION_LOCK_POLL_SECONDS = 0.5
+
+CONCURRENT_INDEX_RE = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)", re.IGNORECASE)
+
+
+def applied_versions(conn):
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def acquire_migration_lock(conn):
+    # Polled rather than blocking: a session waiting in pg_advisory_lock holds
+    # a snapshot, which a concurrent index build on the lock holder waits for
+    while not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}).scalar():
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+def drop_invalid_index(conn, statement):
+    """An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would keep"""
+
+    match = CONCURRENT_INDEX_RE.search(statement)
+    if not match:
+        return
+
+    invalid = conn.execute(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": match.group(1)},
+    ).scalar()
+
+    if invalid:
+        logger.warning("Rebuilding invalid index %s", match.group(1))
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}"))
+
+
+def run_migrations(engine):
+    """Apply pending migrations, one statement at a time; returns the versions applied.
+
+    A migration is recorded only after all its statements succeed. One that
+    failed part-way is retried in full on the next start.
+    """
+
+    applied_now = []
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        acquire_migration_lock(conn)
+
+        try:
+            conn.execute(text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "version INTEGER PRIMARY KEY, "
+                "description VARCHAR(255) NOT NULL, "
+                "applied_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'))"
+            ))
+
+            applied = applied_versions(conn)
+
+            for version, description, statements in MIGRATIONS:
+                if version in applied:
+                    continue
+
+                for statement in statements:
+                    if callable(statement):
+                        statement(conn)
+                        continue
+                    drop_invalid_index(conn, statement)
+                    conn.execute(text(statement))
+
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, description) VALUES (:version, :description)"),
+                    {"version": version, "description": description},
+                )
+                applied_now.append(version)
+
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+    return applied_now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations without applying them")
+    args = parser.parse_args()
+
+    from app.init_db import engine
+    # Imported from the models module so every table is registered on it
+    from app.models.db import Base
+
+    if args.status:
+        with engine.connect() as conn:
+            exists = conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar()
+            applied = applied_versions(conn) if exists else set()
+        for version, description, _ in MIGRATIONS:
+            print(f"{version:>4} {'applied' if version in applied else 'pending':<8} {description}")
+        return
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Applied: {run_migrations(engine) or 'nothing pending'}")
+
+
+if __name__ == "__main__":
+    main()
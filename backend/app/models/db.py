@@ -1,7 +1,7 @@
 from datetime import datetime
 import uuid
 from enum import Enum
-from sqlalchemy import Column, String, Integer, Text,DateTime, Float, Boolean, ForeignKey,Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Text,DateTime, Date, Float, Boolean, ForeignKey,Enum as SQLEnum, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from app.init_db import Base
@@ -116,6 +116,11 @@ class Ticket(Base):
     session = relationship("ChatSessions", back_populates="tickets")
 
 
+# ai_results->>'category' with the key inlined rather than bound, so the planner
+# can match it to the expression index from app/migrations.py under asyncpg too
+ticket_category = Ticket.ai_results.op("->>", return_type=String)(literal_column("'category'"))
+
+
 class GuardRails(Base):
     __tablename__ = "guardrail_events"
 
@@ -129,3 +134,31 @@ class GuardRails(Base):
     # Relationships
     session = relationship("ChatSessions")
     message = relationship("ChatMessages", back_populates="guardrails")
+
+
+class KBChunk(Base):
+    __tablename__ = "kb_chunks"
+
+    id = Column(String(64), primary_key=True)
+    source = Column(String(255), index=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class KBVersion(Base):
+    __tablename__ = "kb_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(String(64), nullable=False)
+    chunk_count = Column(Integer, nullable=False)
+    added = Column(Integer, nullable=False, default=0)
+    removed = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MetricsDaily(Base):
+    """Daily counters behind /api/metrics/summary, kept up to date by services/rollup.py"""
+    __tablename__ = "metrics_daily"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(64), primary_key=True)
+    value = Column(Float, nullable=False, default=0)
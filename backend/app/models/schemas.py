@@ -70,6 +70,20 @@ class TicketResponse(BaseModel):
     updated_at: datetime
 
 
+class TicketListItem(BaseModel):
+    """A ticket in GET /api/tickets: `id` plus whichever `fields` were requested (all by default)"""
+
+    id: str
+    session_id: Optional[str | int] = None
+    tier: Optional[str] = None
+    severity: Optional[str] = None
+    status: Optional[str] = None
+    user_role: Optional[str] = None
+    ai_results: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class TicketUpdate(BaseModel):
     status: str = Field(None, example="CLOSED")
     tier: Optional[str] = Field(None, example="TIER_2")
@@ -1,12 +1,20 @@
 from fastapi import APIRouter, Depends
-from app.services.memory import get_or_create_session
+from fastapi.responses import StreamingResponse
+from app.services.memory import get_or_create_session, SessionRef
 from app.models.schemas import ChatRequest, ChatResponse
-from app.services.rag import ask_question
-from sqlalchemy.orm import Session
+from app.services.rag import ask_question, chat_turn
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.db import User
 from fastapi import HTTPException
-from app.init_db import get_db
+from app.init_db import get_async_db, asyncSessionLocal
 from app.administration.dependencies import get_current_user
+import json
+import logging
+from contextlib import aclosing
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(
@@ -14,29 +22,80 @@ router = APIRouter(
     tags=["chat"],
 )
 
+
+async def prepare_chat_request(request: ChatRequest, db: AsyncSession, user) -> SessionRef:
+    """Resolve the caller and their chat session once for the whole request"""
+
+    request.session_id = user["session_id"]
+    request.user_role = user["role"]
+    request.user_id = user.get("user_id")
+
+    # Tokens carry user_id; only ones issued without it need the lookup
+    if not request.user_id:
+        request.user_id = await db.scalar(select(User.id).filter(User.username == user["username"]))
+        if not request.user_id:
+            raise HTTPException(404, "User not found")
+
+    try:
+        session = await db.run_sync(
+            get_or_create_session,
+            session_id=request.session_id,
+            user_id=request.user_id,
+            user_role=request.user_role,
+            context=request.context
+        )
+    except IntegrityError:
+        # chat_sessions.user_id references a user that no longer exists
+        await db.rollback()
+        raise HTTPException(404, "User not found")
+
+    if session.user_id != request.user_id:
+        raise HTTPException(403, "Session belongs to another user")
+
+    return session
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @router.post("/chat", response_model=ChatResponse)
-def chat_post(
+async def chat_post(
     request: ChatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user=Depends(get_current_user)
     
 ):
-    request.session_id = user["session_id"]
-    request.user_role = user["role"]
+    session = await prepare_chat_request(request, db, user)
 
-    db_user = db.query(User).filter(
-        User.username == user["username"]
-    ).first()
+    return await ask_question(request, db, session)
 
-    if not db_user:
-        raise HTTPException(404, "User not found")
 
-    session = get_or_create_session(
-        db=db,
-        session_id=user["session_id"],
-        user_id=db_user.id, 
-        user_role=user["role"],
-        context=request.context
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(get_current_user)
+):
+    session = await prepare_chat_request(request, db, user)
+
+    async def events():
+        # The stream outlives the request-scoped session, so it gets its own
+        async with asyncSessionLocal() as stream_db:
+            # On disconnect chat_turn is closed here, saving the partial turn while stream_db is open
+            try:
+                async with aclosing(chat_turn(request, stream_db, session, stream=True)) as turn_events:
+                    async for event, payload in turn_events:
+                        if event == "token":
+                            yield sse("token", {"delta": payload})
+                        else:
+                            yield sse("final", payload.model_dump(mode="json"))
+            except Exception:
+                logger.exception("Chat stream failed")
+                yield sse("error", {"detail": "The assistant could not complete this answer."})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    
-    return ask_question(request, db)
\ No newline at end of file
@@ -1,7 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.init_db import get_db
-from app.services.metrics import metrics_summary, metrics_trends
+from app.config import Config
+from app.services.metrics import metrics_summary, metrics_trends, payload_etag, trends_cache
+from app.services.answer_cache import answer_cache
+from app.services.fast_path import rule_classifier
+from app.services.retrieval import retrieval_stats
+from app.services.retrieval_cache import retrieval_cache
+from app.services.history_cache import history_cache
+from app.services.context_builder import token_stats
+from app.services.single_flight import single_flight
+from app.services.corpus import kb_corpus
+from app.administration.security import password_pool
+from app.services.container import services
 
 router = APIRouter(
     prefix="/api/metrics",
@@ -15,5 +27,37 @@ def get_metrics_summary(db: Session = Depends(get_db)):
 
 
 @router.get("/trends")
-def get_metrics_trends(days: int = 7, db: Session = Depends(get_db)):
-    return metrics_trends(db, days)
\ No newline at end of file
+def get_metrics_trends(
+    request: Request,
+    days: int = Query(7, ge=0, le=Config.TRENDS_MAX_DAYS),
+    db: Session = Depends(get_db),
+):
+    payload = metrics_trends(db, days)
+
+    # Dashboards poll this; an unchanged payload costs a 304 with no body
+    etag = payload_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=payload, headers=headers)
+
+
+@router.get("/runtime")
+def get_runtime_metrics():
+    return {
+        "answerCache": answer_cache.stats(),
+        "classifierFastPath": rule_classifier.stats(),
+        "singleFlight": single_flight.stats(),
+        "retrieval": retrieval_stats.stats(),
+        "retrievalCache": retrieval_cache.stats(),
+        "embeddingCache": services.embedding_cache_stats(),
+        "trendsCache": trends_cache.stats(),
+        "historyCache": history_cache.stats(),
+        "passwordPool": password_pool.stats(),
+        "promptTokens": token_stats.stats(),
+        "kbCorpus": kb_corpus.stats(),
+    }
@@ -1,11 +1,13 @@
-from fastapi import APIRouter,Depends
+from fastapi import APIRouter,Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from app.init_db import get_db
-from app.models.schemas import TicketCreate, TicketResponse, TicketUpdate
+from app.models.schemas import TicketCreate, TicketResponse, TicketUpdate, TicketListItem
 from app.models.db import Ticket, ChatSessions
 from app.administration.dependencies import get_current_user
+from app.services.pagination import encode_cursor, keyset_page
 from fastapi import HTTPException, Query
-from app.models.db import Ticket
 import uuid
 
 router = APIRouter(
@@ -33,19 +35,65 @@ def create_ticket(ticket: TicketCreate, db: Session = Depends(get_db)):
 
     return new_ticket
 
-@router.get("/tickets", response_model=list[TicketResponse])
+TICKET_FIELDS = {
+    "id": Ticket.id,
+    "session_id": Ticket.session_id,
+    "tier": Ticket.tier,
+    "severity": Ticket.severity,
+    "status": Ticket.status,
+    "user_role": Ticket.user_role,
+    "ai_results": Ticket.ai_results,
+    "created_at": Ticket.created_at,
+    "updated_at": Ticket.updated_at,
+}
+
+SORT_COLUMNS = {
+    "created_at": Ticket.created_at,
+    "updated_at": Ticket.updated_at,
+}
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+PAGE_HEADERS = {
+    "X-Next-Cursor": {"description": "Cursor for the next page; absent on the last page", "schema": {"type": "string"}},
+    "Link": {"description": 'URL of the next page with rel="next"', "schema": {"type": "string"}},
+}
+
+
+@router.get(
+    "/tickets",
+    response_model=list[TicketListItem],
+    response_model_exclude_unset=True,
+    responses={200: {"headers": PAGE_HEADERS}},
+)
 def list_tickets(
+    request: Request,
     status: str | None = Query(None),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description=f"Page size, at most {MAX_PAGE_SIZE}"),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    sort: str = Query("-created_at", pattern="^-?(created_at|updated_at)$"),
+    fields: str | None = Query(None, description="Comma-separated ticket fields, e.g. id,status,severity,created_at"),
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
     role = user["role"].lower()
     user_id = user["user_id"]
 
-    query = db.query(Ticket).join(
-        ChatSessions,
-        Ticket.session_id == ChatSessions.id
-    )
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(TICKET_FIELDS)
+
+    unknown = sorted(set(selected) - set(TICKET_FIELDS))
+    if unknown:
+        raise HTTPException(400, f"Unknown ticket fields: {', '.join(unknown)}")
+
+    if "id" not in selected:
+        selected.insert(0, "id")
+
+    sort_column = SORT_COLUMNS[sort.lstrip("-")]
+
+    # Only the requested columns are read, so ai_results is skipped unless asked for
+    query = db.query(*(TICKET_FIELDS[f] for f in selected), sort_column.label("sort_key"))
 
     if role == "admin":
         pass
@@ -54,11 +102,11 @@ def list_tickets(
         pass
 
     elif role == "instructor":
-        query = query.filter(ChatSessions.user_id == user_id)
+        query = query.join(ChatSessions, Ticket.session_id == ChatSessions.id).filter(ChatSessions.user_id == user_id)
 
 
     elif role == "trainee":
-        query = query.filter(ChatSessions.user_id == user_id)
+        query = query.join(ChatSessions, Ticket.session_id == ChatSessions.id).filter(ChatSessions.user_id == user_id)
 
 
     elif role == "operator":
@@ -70,7 +118,18 @@ def list_tickets(
     if status:
         query = query.filter(Ticket.status == status)
 
-    return query.all()
+    rows = keyset_page(query, sort, sort_column, Ticket.id, cursor, limit).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort, rows[-1].sort_key, rows[-1].id)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    tickets = [{f: getattr(row, f) for f in selected} for row in rows]
+
+    return JSONResponse(content=jsonable_encoder(tickets), headers=headers)
 
 
 @router.put("/tickets/{ticket_id}", response_model=TicketResponse)
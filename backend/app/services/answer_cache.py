@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from app.config import Config
+
+
+class SemanticAnswerCache:
+    """LRU/TTL cache of RAG answers keyed on query-embedding similarity and user role.
+
+    Only the generated answer and its documents are cached. Classification
+    depends on the session's history, so it runs again on every request, as do
+    guardrails, tiering, ticket creation and persistence.
+    """
+
+    def __init__(self, threshold: float, max_entries: int, ttl_seconds: float):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._matrices = {}
+        self._next_key = 0
+        self._kb_version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_kb_version(self, kb_version):
+        if kb_version != self._kb_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrices.clear()
+            self._kb_version = kb_version
+
+    def _role_matrix(self, role):
+        cached = self._matrices.get(role)
+        if cached is None:
+            keys = [key for key, entry in self._entries.items() if entry["role"] == role]
+            matrix = np.vstack([self._entries[key]["vector"] for key in keys]) if keys else None
+            cached = self._matrices[role] = (keys, matrix)
+        return cached
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._matrices.pop(entry["role"], None)
+
+    def lookup(self, vector, role: str, kb_version):
+
+        role = (role or "").lower()
+
+        with self._lock:
+            self._sync_kb_version(kb_version)
+
+            now = time.monotonic()
+            expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl_seconds]
+            for key in expired:
+                self._drop(key)
+                self.evictions += 1
+
+            keys, matrix = self._role_matrix(role)
+
+            if matrix is not None:
+                scores = matrix @ self._normalize(vector)
+                best = int(np.argmax(scores))
+
+                if scores[best] >= self.threshold:
+                    key = keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]["value"]
+
+            self.misses += 1
+            return None
+
+    def store(self, vector, role: str, kb_version, value):
+
+        role = (role or "").lower()
+
+        with self._lock:
+            self._sync_kb_version(kb_version)
+
+            key = self._next_key
+            self._next_key += 1
+
+            self._entries[key] = {
+                "role": role,
+                "vector": self._normalize(vector),
+                "value": value,
+                "created": time.monotonic(),
+            }
+            self._matrices.pop(role, None)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": Config.ANSWER_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "kbVersion": self._kb_version,
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=Config.ANSWER_CACHE_THRESHOLD,
+    max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+)
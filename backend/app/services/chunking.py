@@ -1,19 +1,165 @@
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import os
+import re
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.config import Config
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-KB_DIR = os.path.join(BASE_DIR, "kb") 
+KB_DIR = os.path.join(BASE_DIR, "kb")
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+# Bump when chunk boundaries or metadata change so KB snapshots are rebuilt
+CHUNKER_VERSION = 1
+
+
+def slugify(text: str) -> str:
+    return SLUG_RE.sub("-", text.lower().replace("`", "")).strip("-") or "section"
+
+
+def parse_front_matter(text: str):
+    """(metadata, body) for a file that starts with a `---` delimited block of `key: value` lines"""
+
+    lines = text.split("\n")
+    if not lines or lines[0].strip() != "---":
+        return {}, text
+
+    for end in range(1, len(lines)):
+        if lines[end].strip() == "---":
+            break
+    else:
+        return {}, text
+
+    metadata = {}
+    for line in lines[1:end]:
+        key, sep, value = line.partition(":")
+        if sep and key.strip():
+            metadata[key.strip()] = value.strip()
+
+    return metadata, "\n".join(lines[end + 1:])
+
+
+def split_sections(body: str):
+    """[(heading path, text)] with every heading starting a new section.
+
+    A heading with no text of its own (directly followed by a subheading) is
+    folded into the next section rather than becoming a chunk on its own.
+    """
+
+    sections = []
+    path = []
+    lines = []
+    in_fence = False
+
+    def close():
+        text = "\n".join(lines).strip()
+        if text and any(not HEADING_RE.match(line) for line in text.split("\n") if line.strip()):
+            sections.append(([title for _, title in path], text))
+            lines.clear()
+
+    for line in body.split("\n"):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+
+        heading = None if in_fence else HEADING_RE.match(line)
+
+        if heading:
+            close()
+            level = len(heading.group(1))
+            while path and path[-1][0] >= level:
+                path.pop()
+            path.append((level, heading.group(2).strip()))
+
+        lines.append(line)
+
+    close()
+
+    # Trailing headings with no body at all
+    if lines and "\n".join(lines).strip():
+        sections.append(([title for _, title in path], "\n".join(lines).strip()))
+
+    return sections
+
+
+def chunk_markdown(text: str, source: str, chunk_size: int = None, chunk_overlap: int = None):
+    """Chunks of one markdown file, with stable ids `<file>#<section>#<n>`.
+
+    Sections are kept whole up to `chunk_size` characters; longer ones are
+    split and every continuation repeats the section heading. `n` counts chunks
+    within a section, and a section slug repeated in the same file gets a
+    numeric suffix, so ids only change when the file's structure does.
+    """
+
+    chunk_size = chunk_size or Config.KB_CHUNK_SIZE
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=Config.KB_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap,
+    )
+
+    front_matter, body = parse_front_matter(text)
+    file_id = os.path.splitext(os.path.basename(source))[0]
+    sections = split_sections(body)
+
+    title = front_matter.get("title")
+    if not title:
+        title = next((path[0] for path, _ in sections if path), file_id)
+
+    chunks = []
+    slugs = {}
+
+    for path, section_text in sections:
+        slug = slugify(path[-1]) if path else "intro"
+        slugs[slug] = slugs.get(slug, 0) + 1
+        if slugs[slug] > 1:
+            slug = f"{slug}-{slugs[slug]}"
+
+        heading = section_text.split("\n", 1)[0] if HEADING_RE.match(section_text.split("\n", 1)[0]) else ""
+
+        if len(section_text) <= chunk_size:
+            parts = [section_text]
+        else:
+            parts = splitter.split_text(section_text)
+            parts = [parts[0]] + [
+                part if not heading or part.startswith(heading) else f"{heading}\n\n{part}"
+                for part in parts[1:]
+            ]
+
+        for n, part in enumerate(parts):
+            chunks.append(Document(
+                page_content=part,
+                metadata={
+                    "source": source,
+                    "id": f"{file_id}#{slug}#{n}",
+                    "title": title,
+                    "section": " > ".join(path) or title,
+                    "doc_id": front_matter.get("id", file_id),
+                    "doc_version": front_matter.get("version", ""),
+                },
+            ))
+
+    return chunks
+
+
+def kb_files(kb_dir: str = KB_DIR):
+    """Markdown files under `kb_dir`, in path order so runs are reproducible"""
+
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(kb_dir)
+        for name in names
+        if name.endswith(".md")
+    )
+
 
-loader = DirectoryLoader(
-    KB_DIR,
-    glob="**/*.md",
-    loader_cls=TextLoader,
-    loader_kwargs={"encoding": "utf-8"}
-)
+def load_kb(kb_dir: str = KB_DIR):
+    """Chunk every markdown file under `kb_dir`; consumers in a process share one copy through corpus.kb_corpus"""
 
-documents = loader.load()
+    chunks = []
+    for path in kb_files(kb_dir):
+        with open(path, encoding="utf-8") as f:
+            chunks.extend(chunk_markdown(f.read(), path))
 
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=20)
-docs = splitter.split_documents(documents)
\ No newline at end of file
+    return chunks
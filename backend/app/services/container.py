@@ -0,0 +1,212 @@
+import asyncio
+import threading
+import time
+import logging
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Builds the vectorstore, retriever, LLM and chains on first use.
+
+    Nothing here touches the network at import time; `warm_up` builds everything
+    ahead of the first request and flips `ready`.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances = {}
+        self.ready = False
+        self.warm_up_error = None
+        self.warm_up_seconds = None
+        self.warm_up_attempts = 0
+        self._kb_version = None
+        self._corpus_synced_version = None
+
+    def _get(self, name, factory):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+            return self._instances[name]
+
+    def override(self, name, instance):
+        """Use `instance` for a component instead of building it (benchmarks, local runs)"""
+        with self._lock:
+            self._instances[name] = instance
+
+    @property
+    def embeddings(self):
+        from app.services.embeddings import build_embeddings
+        return self._get("embeddings", build_embeddings)
+
+    @property
+    def vectorstore(self):
+        from app.services.embeddings import build_vectorstore
+        return self._get("vectorstore", lambda: build_vectorstore(self.embeddings))
+
+    @property
+    def lexical_index(self):
+        from app.services.corpus import kb_corpus
+        from app.services.retrieval import BM25Index
+        return self._get("lexical_index", lambda: BM25Index(kb_corpus.documents()))
+
+    @property
+    def retriever(self):
+        from app.services.retrieval import HybridRetriever
+        return self._get("retriever", lambda: HybridRetriever(
+            lexical=self.lexical_index,
+            vectorstore=None if Config.RETRIEVAL_MODE == "lexical" else self.vectorstore,
+            mode=Config.RETRIEVAL_MODE,
+            k=Config.RETRIEVAL_K,
+            candidates=Config.RETRIEVAL_CANDIDATES,
+            rrf_k=Config.RRF_K,
+            lambda_mult=0.25,
+        ))
+
+    @property
+    def llm(self):
+        from langchain_openai import ChatOpenAI
+        return self._get("llm", lambda: ChatOpenAI(model=Config.LLM_MODEL, temperature=0))
+
+    @property
+    def rag_chain(self):
+        from app.services.rag import build_rag_chain
+        return self._get("rag_chain", lambda: build_rag_chain(self.llm))
+
+    @property
+    def rag_stream_chain(self):
+        from app.services.rag import build_rag_stream_chain
+        return self._get("rag_stream_chain", lambda: build_rag_stream_chain(self.llm))
+
+    @property
+    def classify_chain(self):
+        from app.services.rag import build_classify_chain
+        return self._get("classify_chain", lambda: build_classify_chain(self.llm))
+
+    def kb_version(self):
+        """Last KB version resolved by `refresh_kb_version`; never touches the database"""
+        return self._kb_version
+
+    def refresh_kb_version(self):
+        """Re-read the KB version (a database query with pgvector); blocking, so run off the event loop"""
+
+        from app.services.ingestion import resolve_kb_version
+
+        try:
+            self._kb_version = resolve_kb_version()
+        except Exception:
+            logger.exception("Could not resolve KB version")
+
+        self._sync_corpus(self._kb_version)
+
+        return self._kb_version
+
+    async def refresh_kb_version_periodically(self):
+        """Refresh the KB version every KB_VERSION_CHECK_SECONDS on a worker thread"""
+
+        while True:
+            await asyncio.sleep(Config.KB_VERSION_CHECK_SECONDS)
+            await asyncio.to_thread(self.refresh_kb_version)
+
+    def _sync_corpus(self, kb_version):
+        """Reload the chunk set and BM25 index when the KB version moves on.
+
+        With pgvector the version comes from the last ingestion run, which may
+        have happened after this process chunked the KB. The reload runs once
+        per version on a background thread; the old index serves until then.
+        """
+
+        from app.services.corpus import kb_corpus
+
+        if kb_version is None or kb_version == self._corpus_synced_version:
+            return
+        self._corpus_synced_version = kb_version
+
+        if not kb_corpus.loaded or kb_corpus.version == kb_version:
+            return
+
+        threading.Thread(
+            target=self._reload_corpus, args=(kb_version,), name="kb-corpus-reload", daemon=True,
+        ).start()
+
+    def _reload_corpus(self, kb_version):
+        from app.services.corpus import kb_corpus
+        from app.services.retrieval import BM25Index
+
+        try:
+            lexical = BM25Index(kb_corpus.reload())
+        except Exception:
+            logger.exception("Could not reload the KB corpus")
+            self._corpus_synced_version = None
+            return
+
+        if kb_corpus.version != kb_version:
+            logger.warning("KB files are at version %s but ingestion is at %s", kb_corpus.version, kb_version)
+
+        with self._lock:
+            previous = self._instances.get("lexical_index")
+            self._instances["lexical_index"] = lexical
+            retriever = self._instances.get("retriever")
+            if previous is not None and getattr(retriever, "lexical", None) is previous:
+                retriever.lexical = lexical
+
+    def embedding_cache_stats(self):
+        embeddings = self._instances.get("embeddings")
+        stats = getattr(embeddings, "stats", None)
+        return stats() if stats else None
+
+    def warm_up(self):
+
+        started = time.perf_counter()
+        self.warm_up_attempts += 1
+
+        try:
+            self.retriever
+            self.rag_chain
+            self.rag_stream_chain
+            self.classify_chain
+            self.refresh_kb_version()
+
+            # Loads (and on first run downloads) the tokenizer outside any request
+            from app.services.context_builder import encoding
+            encoding()
+        except Exception as exc:
+            self.warm_up_error = str(exc)
+            logger.exception("Service warm-up failed")
+            return False
+
+        self.warm_up_seconds = round(time.perf_counter() - started, 3)
+        self.warm_up_error = None
+        self.ready = True
+
+        return True
+
+    async def warm_up_until_ready(self, initial_delay: float = 1.0):
+        """Retry `warm_up` with exponential backoff until it succeeds.
+
+        A database, pgvector or tokenizer download that is not reachable yet at
+        startup would otherwise leave `/health` at 503 for the process lifetime.
+        """
+
+        delay = initial_delay
+        while not await asyncio.to_thread(self.warm_up):
+            logger.warning("Service warm-up attempt %d failed; retrying in %.0fs", self.warm_up_attempts, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, Config.WARM_UP_RETRY_MAX_SECONDS)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "components": sorted(self._instances),
+            "warmUpSeconds": self.warm_up_seconds,
+            "warmUpAttempts": self.warm_up_attempts,
+            "error": self.warm_up_error,
+        }
+
+
+services = ServiceContainer()
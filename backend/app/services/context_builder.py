@@ -0,0 +1,154 @@
+import logging
+import re
+from collections import Counter
+from functools import lru_cache
+from app.config import Config
+from app.services.stats import TokenStats
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r"\w+")
+
+# Chat-format overhead per message and per reply (OpenAI's counting guide)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Overlaps shorter than this are coincidence, not splitter borders
+MIN_OVERLAP_CHARS = 12
+SHINGLE_SIZE = 3
+
+
+# TOKEN COUNTING
+
+@lru_cache(maxsize=1)
+def encoding():
+    """tiktoken encoding for LLM_MODEL, or None when it cannot be loaded (e.g. offline)"""
+
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(Config.LLM_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        logger.warning("tiktoken encoding unavailable; estimating tokens as characters / 4")
+        return None
+
+
+# The system prompts repeat on every call, so their counts are memoised
+@lru_cache(maxsize=256)
+def count_tokens(text: str) -> int:
+    enc = encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    enc = encoding()
+    if enc is None:
+        return text[:limit * 4]
+    return enc.decode(enc.encode(text, disallowed_special=())[:limit])
+
+
+def count_message_tokens(messages) -> int:
+    return sum(count_tokens(str(message.content)) + TOKENS_PER_MESSAGE for message in messages) + TOKENS_PER_REPLY
+
+
+# STATS
+
+token_stats = TokenStats(budget=Config.CONTEXT_TOKEN_BUDGET)
+
+
+# CONTEXT ASSEMBLY
+
+def _shingles(text: str):
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _overlap(first: str, second: str) -> int:
+    """Length of the longest suffix of `first` that is also a prefix of `second`"""
+
+    for size in range(min(len(first), len(second)) // 2, MIN_OVERLAP_CHARS - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+
+def _header(doc) -> str:
+    source = doc.metadata.get("source", "unknown")
+    doc_id = doc.metadata.get("id", source)
+    return f"[ID: {doc_id} | SOURCE: {source}]\n"
+
+
+def build_context(docs, budget: int = None, duplicate_threshold: float = None):
+    """Pack ranked chunks into at most `budget` tokens.
+
+    Chunks are taken in rank order. A chunk is skipped when most of its word
+    shingles already appear in a chunk taken before it, e.g. the same passage
+    in two policy versions. When it shares a splitter border with a taken chunk
+    of the same source, the repeated text is trimmed. A chunk that does not fit
+    the remaining budget is skipped, and smaller ones further down may still
+    fit. The top chunk is truncated rather than dropped. Returns (text, counts).
+    """
+
+    budget = Config.CONTEXT_TOKEN_BUDGET if budget is None else budget
+    duplicate_threshold = Config.CONTEXT_DUPLICATE_THRESHOLD if duplicate_threshold is None else duplicate_threshold
+
+    separator_tokens = count_tokens("\n\n")
+    kept = []  # (doc, text, shingles)
+    parts = []
+    used = 0
+    counts = Counter(chunks=len(docs))
+
+    for doc in docs:
+        text = doc.page_content.strip()
+        shingles = _shingles(text)
+
+        if any(
+            shingles and len(shingles & other) / len(shingles) >= duplicate_threshold
+            for _, _, other in kept
+        ):
+            counts["duplicates"] += 1
+            continue
+
+        source = doc.metadata.get("source")
+        for other_doc, other_text, _ in kept:
+            if other_doc.metadata.get("source") != source:
+                continue
+            # The later chunk starts with the earlier one's tail, or the other way round
+            leading = _overlap(other_text, text)
+            if leading:
+                text = text[leading:].lstrip()
+                counts["overlapChars"] += leading
+            trailing = _overlap(text, other_text)
+            if trailing:
+                text = text[:-trailing].rstrip()
+                counts["overlapChars"] += trailing
+
+        if not text:
+            counts["duplicates"] += 1
+            continue
+
+        header = _header(doc)
+        cost = count_tokens(header) + count_tokens(text) + (separator_tokens if parts else 0)
+
+        if used + cost > budget:
+            if parts:
+                counts["overBudget"] += 1
+                continue
+            text = truncate_tokens(text, max(0, budget - count_tokens(header)))
+            cost = count_tokens(header) + count_tokens(text)
+            counts["truncated"] += 1
+
+        kept.append((doc, text, shingles))
+        parts.append(header + text)
+        used += cost
+
+    counts["used"] = len(parts)
+    counts["contextTokens"] = used
+
+    return "\n\n".join(parts), counts
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from langchain_core.documents import Document
+from app.config import Config
+from app.services.chunking import KB_DIR, CHUNKER_VERSION, kb_files, load_kb
+from app.services.ingestion import assign_chunk_hashes, kb_version_for
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"KBSNAP01"
+HEADER_LEN = struct.Struct("<I")
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class KBCorpus:
+    """The chunked KB, built once per process and shared by every consumer.
+
+    The first process to start parses and chunks `kb_dir` and writes a snapshot
+    of the chunks: a JSON header (file manifest, chunk metadata and offsets)
+    followed by the UTF-8 chunk texts. Later processes read their chunks from
+    that file instead of re-parsing the Markdown; each still holds its own copy
+    of the texts. The snapshot is valid while every KB file has the mtime and
+    size recorded in the manifest (or, failing that, the same content hash) and
+    the chunker settings match. `reload` re-reads the KB after it has changed.
+    """
+
+    def __init__(self, kb_dir: str, snapshot_path: str = None):
+        self.kb_dir = kb_dir
+        self.snapshot_path = snapshot_path
+
+        self._lock = threading.Lock()
+        self._docs = None
+        self._version = None
+
+        self.source = None
+        self.load_seconds = None
+        self.reloads = 0
+
+    def _chunker_settings(self):
+        return {
+            "chunker": CHUNKER_VERSION,
+            "chunkSize": Config.KB_CHUNK_SIZE,
+            "chunkOverlap": Config.KB_CHUNK_OVERLAP,
+        }
+
+    def _manifest(self, paths):
+        manifest = []
+        for path in paths:
+            stat = os.stat(path)
+            manifest.append({
+                "path": os.path.relpath(path, self.kb_dir),
+                "mtimeNs": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": _file_hash(path),
+            })
+        return manifest
+
+    def _snapshot_matches(self, header, paths):
+        if header.get("settings") != self._chunker_settings():
+            return False
+
+        recorded = {entry["path"]: entry for entry in header.get("files", [])}
+        if sorted(recorded) != sorted(os.path.relpath(path, self.kb_dir) for path in paths):
+            return False
+
+        for path in paths:
+            entry = recorded[os.path.relpath(path, self.kb_dir)]
+            stat = os.stat(path)
+            if (stat.st_mtime_ns, stat.st_size) == (entry["mtimeNs"], entry["size"]):
+                continue
+            # Touched (checkout, copy) but possibly unchanged
+            if _file_hash(path) != entry["sha256"]:
+                return False
+
+        return True
+
+    def _read_snapshot(self, paths):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    return None
+
+                (header_len,) = HEADER_LEN.unpack(f.read(HEADER_LEN.size))
+                header = json.loads(f.read(header_len))
+
+                # The texts are only read once the manifest still matches
+                if not self._snapshot_matches(header, paths):
+                    return None
+                blob = f.read()
+
+            docs = [
+                Document(
+                    page_content=blob[chunk["offset"]:chunk["offset"] + chunk["length"]].decode("utf-8"),
+                    metadata={**chunk["metadata"], "source": os.path.join(self.kb_dir, chunk["metadata"]["source"])},
+                )
+                for chunk in header["chunks"]
+            ]
+            return docs, header["kbVersion"]
+
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+    def _write_snapshot(self, manifest, docs, version):
+        texts = [doc.page_content.encode("utf-8") for doc in docs]
+
+        chunks, offset = [], 0
+        for doc, text in zip(docs, texts):
+            metadata = dict(doc.metadata)
+            # Stored relative so a snapshot survives the checkout moving
+            metadata["source"] = os.path.relpath(metadata.get("source", ""), self.kb_dir)
+            chunks.append({"offset": offset, "length": len(text), "metadata": metadata})
+            offset += len(text)
+
+        header = json.dumps({
+            "settings": self._chunker_settings(),
+            "files": manifest,
+            "kbVersion": version,
+            "chunks": chunks,
+        }).encode("utf-8")
+
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(HEADER_LEN.pack(len(header)))
+            f.write(header)
+            for text in texts:
+                f.write(text)
+        os.replace(tmp, self.snapshot_path)
+
+    def _load(self):
+        started = time.perf_counter()
+        paths = kb_files(self.kb_dir)
+
+        loaded = self._read_snapshot(paths) if self.snapshot_path else None
+
+        if loaded:
+            docs, version = loaded
+            self.source = "snapshot"
+        else:
+            # Taken before parsing, so an edit made meanwhile invalidates the snapshot
+            manifest = self._manifest(paths) if self.snapshot_path else None
+
+            docs = list(assign_chunk_hashes(load_kb(self.kb_dir)).values())
+            version = kb_version_for(doc.metadata["content_hash"] for doc in docs)
+            self.source = "parsed"
+
+            if self.snapshot_path:
+                try:
+                    self._write_snapshot(manifest, docs, version)
+                except OSError:
+                    logger.exception("Could not write KB snapshot to %s", self.snapshot_path)
+
+        self._docs = docs
+        self._version = version
+        self.load_seconds = round(time.perf_counter() - started, 4)
+
+    def _ensure(self):
+        if self._docs is None:
+            with self._lock:
+                if self._docs is None:
+                    self._load()
+
+    def documents(self):
+        """Chunks in KB order, each with `content_hash` metadata assigned"""
+        self._ensure()
+        return self._docs
+
+    @property
+    def version(self):
+        self._ensure()
+        return self._version
+
+    @property
+    def loaded(self):
+        return self._docs is not None
+
+    def reload(self):
+        """Re-read the KB files (or a snapshot that still matches them); the new chunks"""
+        with self._lock:
+            self._load()
+            self.reloads += 1
+            return self._docs
+
+    def stats(self):
+        return {
+            "chunks": len(self._docs) if self._docs is not None else None,
+            "source": self.source,
+            "loadSeconds": self.load_seconds,
+            "version": self._version,
+            "reloads": self.reloads,
+        }
+
+
+kb_corpus = KBCorpus(KB_DIR, Config.KB_SNAPSHOT_PATH if Config.KB_SNAPSHOT_ENABLED else None)
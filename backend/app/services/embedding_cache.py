@@ -0,0 +1,343 @@
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer only
+    fcntl = None
+
+KEY_BYTES = 16
+# Rows copied per write while compacting, to bound the memory it needs
+COMPACT_BATCH_ROWS = 4096
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class _FileLock:
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+
+
+class EmbeddingSegment:
+    """Append-only file of (content hash, float32 vector) records, memory-mapped.
+
+    Records are fixed size, so the file maps straight onto a structured array
+    whose "vector" field is the embedding matrix; the key column is loaded into
+    a dict of key -> row. Other processes' appends are picked up on the next
+    miss, and a compaction by another process is detected by inode change.
+    With `max_entries` set, the least recently used rows are dropped by
+    rewriting the file.
+
+    `_lock` guards only the in-memory index and is never held across file
+    I/O, so `peek` from the event loop cannot wait on a read, write or
+    compaction. File reads serialise on `_refresh_lock`, writers on the file
+    lock. `put_later` hands writes to a
+    single background thread and serves the vectors from memory meanwhile.
+    """
+
+    def __init__(self, path: str, dim: int, max_entries: int = None, readonly: bool = False):
+        self.path = path
+        self.dim = dim
+        self.max_entries = max_entries
+        self.readonly = readonly
+        self.dtype = np.dtype([("key", "u1", (KEY_BYTES,)), ("vector", "<f4", (dim,))])
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._records = None
+        self._index = OrderedDict()
+        self._rows = 0
+        self._inode = None
+        self._pending = {}
+        self._writer = None
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+        if not readonly:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._refresh()
+
+    def _refresh(self):
+        """Map any rows appended (or a file rewritten) since the last look.
+
+        The file is read under `_refresh_lock`; `_lock` is taken only to swap
+        the new mapping and index in.
+        """
+
+        with self._refresh_lock:
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                return
+
+            with f:
+                # fstat of the open file, so a concurrent rename cannot mismatch size and mapping
+                stat = os.fstat(f.fileno())
+                rows = stat.st_size // self.dtype.itemsize
+                rewritten = stat.st_ino != self._inode
+
+                if not rewritten and rows == self._rows:
+                    return
+
+                records = np.memmap(f, dtype=self.dtype, mode="r", shape=(rows,)) if rows else None
+
+            start = 0 if rewritten else self._rows
+            added = [(records[row]["key"].tobytes(), row) for row in range(start, rows)]
+
+            with self._lock:
+                if rewritten:
+                    self._index = OrderedDict()
+                self._index.update(added)
+                self._records = records
+                self._rows = rows
+                self._inode = stat.st_ino
+
+    def _vector(self, key: bytes):
+        """Vector for `key` from memory, or None; caller holds `_lock`"""
+
+        vector = self._pending.get(key)
+        if vector is not None:
+            return vector
+
+        row = self._index.get(key)
+        if row is None:
+            return None
+
+        self._index.move_to_end(key)
+        return self._records[row]["vector"].tolist()
+
+    def peek(self, key: bytes):
+        """In-memory lookup only, safe on the event loop; a miss is not counted"""
+
+        with self._lock:
+            vector = self._vector(key)
+            if vector is not None:
+                self.hits += 1
+            return vector
+
+    def get(self, key: bytes):
+        """Lookup that maps rows other processes appended on a miss; does file I/O"""
+
+        with self._lock:
+            vector = self._vector(key)
+
+        if vector is None:
+            self._refresh()
+            with self._lock:
+                vector = self._vector(key)
+
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return vector
+
+    def put_many(self, items):
+        if self.readonly or not items:
+            return
+
+        records = np.zeros(len(items), dtype=self.dtype)
+        for i, (key, vector) in enumerate(items):
+            records[i]["key"] = np.frombuffer(key, dtype=np.uint8)
+            records[i]["vector"] = vector
+
+        with _FileLock(self.path + ".lock"):
+            with open(self.path, "ab") as f:
+                # Drop a torn record left by a writer that died mid-append
+                torn = f.tell() % self.dtype.itemsize
+                if torn:
+                    f.truncate(f.tell() - torn)
+                f.write(records.tobytes())
+
+            self._refresh()
+            with self._lock:
+                self.writes += len(items)
+                compact = self.max_entries and len(self._index) > self.max_entries
+
+            if compact:
+                self._compact()
+
+    def put_later(self, items):
+        """`put_many` on the background writer thread; the vectors are served from memory until then"""
+
+        if self.readonly or not items:
+            return
+
+        with self._lock:
+            self._pending.update(items)
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache")
+
+        self._writer.submit(self._write_pending, items)
+
+    def _write_pending(self, items):
+        try:
+            self.put_many(items)
+        finally:
+            with self._lock:
+                for key, _ in items:
+                    self._pending.pop(key, None)
+
+    def _compact(self):
+        # Called with the file lock held, so no writer appends meanwhile. Keep
+        # the most recently used three quarters so compaction is not triggered
+        # again by the very next write
+        with self._refresh_lock:
+            with self._lock:
+                keep = list(self._index.items())[-(self.max_entries * 3 // 4):]
+                records = self._records
+                before = len(self._index)
+
+            rows = [row for _, row in keep]
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                for start in range(0, len(rows), COMPACT_BATCH_ROWS):
+                    f.write(np.ascontiguousarray(records[rows[start:start + COMPACT_BATCH_ROWS]]).tobytes())
+
+            # Mapped before the rename, so the mapping follows the new file
+            compacted = np.memmap(tmp, dtype=self.dtype, mode="r", shape=(len(rows),)) if rows else None
+            inode = os.stat(tmp).st_ino
+            os.replace(tmp, self.path)
+
+            with self._lock:
+                self._records = compacted
+                self._index = OrderedDict((key, row) for row, (key, _) in enumerate(keep))
+                self._rows = len(rows)
+                self._inode = inode
+                self.evictions += before - len(keep)
+
+    def __len__(self):
+        return len(self._index)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps any embeddings backend with a persistent content-hash cache.
+
+    Chunk vectors are kept indefinitely, so re-ingesting unchanged text and
+    restarting the process cost no embedding calls. Query vectors live in a
+    separate, size-bounded segment. `readonly` workers read what another
+    process (e.g. ingestion) wrote and never write themselves.
+    """
+
+    def __init__(self, inner: Embeddings, directory: str, namespace: str, dim: int,
+                 max_queries: int = 50000, readonly: bool = False):
+        self.inner = inner
+        self.dim = dim
+        self.documents = EmbeddingSegment(
+            os.path.join(directory, f"{namespace}-{dim}.documents.bin"), dim, readonly=readonly,
+        )
+        self.queries = EmbeddingSegment(
+            os.path.join(directory, f"{namespace}-{dim}.queries.bin"), dim,
+            max_entries=max_queries, readonly=readonly,
+        )
+
+    def _checked(self, vectors):
+        for vector in vectors:
+            if len(vector) != self.dim:
+                raise ValueError(f"Embedding has {len(vector)} dimensions, cache expects {self.dim}")
+        return vectors
+
+    def _lookup(self, texts):
+        keys = [content_key(text) for text in texts]
+        vectors = [self.documents.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        return keys, vectors, missing
+
+    async def _alookup(self, texts):
+        # Memory first; rows appended by other processes are mapped off the loop
+        keys = [content_key(text) for text in texts]
+        vectors = [self.documents.peek(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            found = await asyncio.to_thread(lambda: [self.documents.get(keys[i]) for i in missing])
+            for i, vector in zip(missing, found):
+                vectors[i] = vector
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        return keys, vectors, missing
+
+    def _fill(self, keys, vectors, missing, computed, write):
+        self._checked(computed)
+
+        new = {}
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+            new.setdefault(keys[i], vector)
+
+        write(list(new.items()))
+        return vectors
+
+    def embed_documents(self, texts):
+        keys, vectors, missing = self._lookup(texts)
+        if missing:
+            computed = self.inner.embed_documents([texts[i] for i in missing])
+            self._fill(keys, vectors, missing, computed, self.documents.put_many)
+        return vectors
+
+    async def aembed_documents(self, texts):
+        keys, vectors, missing = await self._alookup(texts)
+        if missing:
+            computed = await self.inner.aembed_documents([texts[i] for i in missing])
+            self._fill(keys, vectors, missing, computed, self.documents.put_later)
+        return vectors
+
+    def embed_query(self, text):
+        key = content_key(text)
+        vector = self.queries.get(key)
+        if vector is None:
+            vector = self._checked([self.inner.embed_query(text)])[0]
+            self.queries.put_many([(key, vector)])
+        return vector
+
+    async def aembed_query(self, text):
+        key = content_key(text)
+        vector = self.queries.peek(key)
+        if vector is None:
+            vector = await asyncio.to_thread(self.queries.get, key)
+        if vector is None:
+            vector = self._checked([await self.inner.aembed_query(text)])[0]
+            self.queries.put_later([(key, vector)])
+        return vector
+
+    def stats(self):
+        return {
+            "documents": self.documents.stats(),
+            "queries": self.queries.stats(),
+        }
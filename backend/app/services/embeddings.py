@@ -1,32 +1,98 @@
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import hashlib
+import re
+import numpy as np
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 # from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores.pgvector import PGVector
 from app.config import Config
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
 
-## Paths
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-KB_DIR = os.path.join(BASE_DIR, "kb")  
+TOKEN_RE = re.compile(r"[a-z0-9_./-]+")
 
-loader = DirectoryLoader(
-    KB_DIR,
-    glob="**/*.md",
-    loader_cls=TextLoader,
-    loader_kwargs={"encoding": "utf-8"}
-)
 
-documents = loader.load()
+class HashingEmbeddings(Embeddings):
+    """Deterministic offline embedder: word and character n-grams hashed into a fixed dimension."""
 
-splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=20)
-docs = splitter.split_documents(documents)
+    def __init__(self, dim: int = 512, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _features(self, text: str):
+        tokens = TOKEN_RE.findall(text.lower())
+
+        for token in tokens:
+            yield token, 1.0
+
+            padded = f" {token} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i + n], 0.5
+
+        for first, second in zip(tokens, tokens[1:]):
+            yield f"{first} {second}", 1.0
+
+    def _embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+
+        for feature, weight in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * weight
+
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+OPENAI_EMBEDDING_DIM = 1536
+
+
+def build_embeddings():
+
+    if Config.EMBEDDING_BACKEND == "local":
+        embeddings = HashingEmbeddings(dim=Config.LOCAL_EMBEDDING_DIM)
+        namespace, dim = "local", Config.LOCAL_EMBEDDING_DIM
+    else:
+        embeddings = OpenAIEmbeddings(model=OPENAI_EMBEDDING_MODEL)
+        namespace, dim = OPENAI_EMBEDDING_MODEL, OPENAI_EMBEDDING_DIM
+
+    if not Config.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+
+    from app.services.embedding_cache import CachedEmbeddings
+
+    return CachedEmbeddings(
+        embeddings,
+        directory=Config.EMBEDDING_CACHE_DIR,
+        namespace=namespace,
+        dim=dim,
+        max_queries=Config.EMBEDDING_CACHE_MAX_QUERIES,
+        readonly=Config.EMBEDDING_CACHE_READONLY,
+    )
 
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
 
 # vectorstore = Chroma.from_documents(documents=docs, embedding=embeddings, persist_directory="chroma_db")
 
-vectorstore = PGVector.from_documents(documents=docs, embedding=embeddings, collection_name=Config.CONNECTION_NAME, connection_string=Config.CONNECTION_PG_VECTORDB, use_jsonb=True)
+def build_vectorstore(embeddings):
+
+    if Config.VECTOR_BACKEND == "memory":
+        from app.services.corpus import kb_corpus
+        from app.services.vector_index import InMemoryVectorIndex
+
+        return InMemoryVectorIndex.from_documents(kb_corpus.documents(), embeddings)
+
+    # Chunks are embedded by `python -m app.services.ingestion`, never at construction time
+    return PGVector(embedding_function=embeddings, collection_name=Config.CONNECTION_NAME, connection_string=Config.CONNECTION_PG_VECTORDB, use_jsonb=True)
@@ -0,0 +1,150 @@
+import threading
+from typing import Optional
+from app.config import Config
+from app.services.tier_service import TierService
+from app.services.matcher import keyword_matcher, match_message
+
+# Signals mirrored from CLASSIFICATION_PROMPT_TEMPLATE
+REPEATED_FAILURE_PHRASES = [
+    "still not working",
+    "tried that already",
+    "same issue",
+    "again failing",
+    "did this twice",
+]
+
+MULTI_USER_PHRASES = [
+    "multiple users",
+    "entire class",
+    "everyone affected",
+]
+
+FRUSTRATION_PHRASES = [
+    "urgent",
+    "asap",
+    "blocked",
+    "nothing works",
+    "!!!",
+]
+
+MANDATORY_ESCALATION_PHRASES = [
+    "escalate immediately",
+    "immediate escalation",
+    "mandatory escalation",
+    "must be escalated",
+]
+
+keyword_matcher.register("signal", {
+    "repeated_failure": REPEATED_FAILURE_PHRASES,
+    "multi_user": MULTI_USER_PHRASES,
+    "frustration": FRUSTRATION_PHRASES,
+    "mandatory_escalation": MANDATORY_ESCALATION_PHRASES,
+})
+
+# Confidence each rule contributes towards its decision
+ESCALATE_RULES = [
+    ("multi_user_impact", 0.95),
+    ("critical_keyword", 0.95),
+    ("repeated_failure", 0.9),
+    ("mandatory_escalation_in_answer", 0.9),
+    ("tier_3_keyword", 0.9),
+    ("high_keyword", 0.85),
+]
+
+NO_ESCALATION_CONFIDENCE = 0.9
+
+
+class RuleClassifier:
+    """Rules-first stand-in for classify_chain, built on TierService keyword tables.
+
+    `decide` returns a decision only when the rules are confident enough; otherwise
+    the caller falls back to the LLM classifier.
+    """
+
+    def __init__(self, tier_service: TierService, min_confidence: float):
+        self.tier_service = tier_service
+        self.min_confidence = min_confidence
+
+        self._lock = threading.Lock()
+        self.decisive = 0
+        self.deferred = 0
+        self.llm_skipped = 0
+        self.shadow_compared = 0
+        self.shadow_agreed = 0
+
+    def _signals(self, message: str, answer: str, history: str):
+
+        matches = match_message(message)
+        answer_matches = keyword_matcher.match(answer or "")
+        history_matches = keyword_matcher.match(history or "")
+
+        keywords = self.tier_service.match_keywords(message)
+
+        return {
+            "keywords": keywords,
+            "multi_user_impact": matches.has("signal.multi_user"),
+            "critical_keyword": bool(keywords["critical"]),
+            "repeated_failure": matches.has("signal.repeated_failure") or history_matches.has("signal.repeated_failure"),
+            "mandatory_escalation_in_answer": answer_matches.has("signal.mandatory_escalation"),
+            "tier_3_keyword": bool(keywords["tier_3"]),
+            "high_keyword": bool(keywords["high"]),
+            "frustration": matches.has("signal.frustration"),
+        }
+
+    def decide(self, message: str, answer: str, history: str = "") -> Optional[dict]:
+
+        signals = self._signals(message, answer, history)
+        keywords = signals["keywords"]
+
+        fired = [(rule, weight) for rule, weight in ESCALATE_RULES if signals[rule]]
+
+        decision = None
+
+        if fired:
+            rule, confidence = max(fired, key=lambda item: item[1])
+            decision = {"needEscalation": True, "confidence": confidence, "rule": rule}
+
+        elif (
+            keywords["tier_0"]
+            and not keywords["medium"]
+            and not keywords["tier_2"]
+            and not signals["frustration"]
+        ):
+            decision = {"needEscalation": False, "confidence": NO_ESCALATION_CONFIDENCE, "rule": "tier_0_keyword"}
+
+        with self._lock:
+            if decision and decision["confidence"] >= self.min_confidence:
+                self.decisive += 1
+                return decision
+
+            self.deferred += 1
+            return None
+
+    def record_skip(self):
+        with self._lock:
+            self.llm_skipped += 1
+
+    def record_shadow(self, decision: dict, llm_need_escalation: bool):
+        with self._lock:
+            self.shadow_compared += 1
+            if bool(llm_need_escalation) == decision["needEscalation"]:
+                self.shadow_agreed += 1
+
+    def stats(self):
+        evaluated = self.decisive + self.deferred
+        return {
+            "mode": Config.CLASSIFIER_FAST_PATH,
+            "minConfidence": self.min_confidence,
+            "evaluated": evaluated,
+            "decisive": self.decisive,
+            "decisiveRate": round(self.decisive / evaluated, 3) if evaluated else 0,
+            "llmCallsSkipped": self.llm_skipped,
+            "shadowCompared": self.shadow_compared,
+            "shadowAgreement": round(self.shadow_agreed / self.shadow_compared, 3) if self.shadow_compared else None,
+        }
+
+
+rule_classifier = RuleClassifier(
+    tier_service=TierService(),
+    min_confidence=Config.FAST_PATH_MIN_CONFIDENCE,
+)
@@ -1,5 +1,6 @@
 from typing import List, Dict, Any
 from langchain_core.documents import Document
+from app.services.matcher import keyword_matcher, match_message
 
 SECURITY_SENSITIVE_PATTERNS = [
     "disable logging",
@@ -33,46 +34,49 @@ UNAUTHORIZED_TECHNICAL_PATTERNS = [
     "sync time manually",
 ]
 
+keyword_matcher.register("guardrail", {
+    "security_sensitive": SECURITY_SENSITIVE_PATTERNS,
+    "host_access": HOST_ACCESS_PATTERNS,
+    "destructive": DESTRUCTIVE_PATTERNS,
+    "unauthorized_technical": UNAUTHORIZED_TECHNICAL_PATTERNS,
+})
+
 def evaluate_guardrails(message: str, user_role: str) -> Dict[str, Any]:
-    msg = message.lower()
+    matches = match_message(message)
 
-    for pattern in SECURITY_SENSITIVE_PATTERNS:
-        if pattern in msg:
-            return {
-                "blocked": True,
-                "reason": "Security policy prevents this action.",
-                "severity": "HIGH",
-                "needs_escalation": True,
-            }
+    if matches.has("guardrail.security_sensitive"):
+        return {
+            "blocked": True,
+            "reason": "Security policy prevents this action.",
+            "severity": "HIGH",
+            "needs_escalation": True,
+        }
 
-    for pattern in HOST_ACCESS_PATTERNS:
-        if pattern in msg:
-            return {
-                "blocked": True,
-                "reason": "Host/infrastructure access is not permitted.",
-                "severity": "HIGH",
-                "needs_escalation": True,
-            }
+    if matches.has("guardrail.host_access"):
+        return {
+            "blocked": True,
+            "reason": "Host/infrastructure access is not permitted.",
+            "severity": "HIGH",
+            "needs_escalation": True,
+        }
 
     if user_role.lower() in ["trainee", "instructor"]:
-        for pattern in UNAUTHORIZED_TECHNICAL_PATTERNS:
-            if pattern in msg:
-                return {
-                    "blocked": True,
-                    "reason": "This action is restricted for your role.",
-                    "severity": "MEDIUM",
-                    "needs_escalation": False,
-                }
-
-    for pattern in DESTRUCTIVE_PATTERNS:
-        if pattern in msg:
+        if matches.has("guardrail.unauthorized_technical"):
             return {
                 "blocked": True,
-                "reason": "Destructive system actions are restricted.",
-                "severity": "CRITICAL",
-                "needs_escalation": True,
+                "reason": "This action is restricted for your role.",
+                "severity": "MEDIUM",
+                "needs_escalation": False,
             }
 
+    if matches.has("guardrail.destructive"):
+        return {
+            "blocked": True,
+            "reason": "Destructive system actions are restricted.",
+            "severity": "CRITICAL",
+            "needs_escalation": True,
+        }
+
     return {
         "blocked": False,
         "reason": None,
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from app.config import Config
+
+
+def format_history(messages):
+    return "\n".join(f"{role}: {content}" for role, content in messages)
+
+
+class HistoryCache:
+    """Last `depth` messages of recently active sessions, kept in process.
+
+    Each session holds a ring buffer of (role, content) pairs; sessions are
+    evicted least recently used first once `max_sessions` is reached. Buffers
+    are filled from the database on a miss and appended to write-through when
+    a chat turn commits, so a session's next turn needs no history query. The
+    formatted history text is memoised until the next append.
+
+    The cache only sees this process's writes. Entries expire after
+    `ttl_seconds` so turns served by another worker are picked up eventually.
+    """
+
+    def __init__(self, max_sessions: int, depth: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.depth = depth
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # Sequence of the last commit for sessions that were not cached at the
+        # time, so a fill that raced with that commit is not stored stale
+        self._uncached_writes = OrderedDict()
+        self._sequence = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.appends = 0
+
+    @property
+    def enabled(self):
+        return self.max_sessions > 0 and self.depth > 0
+
+    @property
+    def sequence(self):
+        return self._sequence
+
+    def _live_entry(self, session_id):
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+
+        if time.monotonic() - entry["loaded"] > self.ttl_seconds:
+            del self._entries[session_id]
+            self.evictions += 1
+            return None
+
+        return entry
+
+    def history_text(self, session_id, limit: int):
+        """Formatted last `limit` messages, or None on a miss"""
+
+        if not self.enabled or limit > self.depth:
+            return None
+
+        with self._lock:
+            entry = self._live_entry(session_id)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(session_id)
+
+            texts = entry["texts"]
+            if limit not in texts:
+                messages = list(entry["messages"])
+                texts[limit] = format_history(messages[-limit:] if limit else [])
+            return texts[limit]
+
+    def fill(self, session_id, messages, since: int):
+        """Store messages read from the database, oldest first.
+
+        `since` is `sequence` taken before the read; the result is dropped if
+        this session committed a turn in between.
+        """
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if self._uncached_writes.get(session_id, 0) > since:
+                return
+
+            self._entries[session_id] = {
+                "messages": deque(messages, maxlen=self.depth),
+                "texts": {},
+                "loaded": time.monotonic(),
+            }
+            self._entries.move_to_end(session_id)
+
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def append(self, session_id, messages):
+        """Write-through for messages that were just committed"""
+
+        if not self.enabled or not messages:
+            return
+
+        with self._lock:
+            self._sequence += 1
+            entry = self._live_entry(session_id)
+
+            if entry is None:
+                self._uncached_writes[session_id] = self._sequence
+                self._uncached_writes.move_to_end(session_id)
+                while len(self._uncached_writes) > self.max_sessions:
+                    self._uncached_writes.popitem(last=False)
+                return
+
+            entry["messages"].extend(messages)
+            entry["texts"].clear()
+            self.appends += len(messages)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._uncached_writes.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "sessions": len(self._entries),
+            "depth": self.depth,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+            "appends": self.appends,
+            "evictions": self.evictions,
+        }
+
+
+history_cache = HistoryCache(
+    max_sessions=Config.HISTORY_CACHE_SESSIONS,
+    depth=Config.HISTORY_CACHE_DEPTH,
+    ttl_seconds=Config.HISTORY_CACHE_TTL_SECONDS,
+)
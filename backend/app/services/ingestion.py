@@ -0,0 +1,148 @@
+import argparse
+import hashlib
+import os
+from datetime import datetime
+from app.config import Config
+from app.init_db import engine, sessionLocal
+from app.models.db import KBChunk, KBVersion
+from app.services.chunking import KB_DIR
+
+
+def chunk_hash(doc, occurrence: int = 0) -> str:
+    """Vector row id for a chunk: chunk id (or relative source path) + content (+ repeat index)"""
+    key = doc.metadata.get("id") or os.path.relpath(doc.metadata.get("source", ""), KB_DIR)
+    payload = f"{key}\n{occurrence}\n{doc.page_content}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def assign_chunk_hashes(docs):
+
+    seen = {}
+    hashed = {}
+
+    for doc in docs:
+        base = chunk_hash(doc)
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+
+        chunk_id = base if occurrence == 0 else chunk_hash(doc, occurrence)
+        doc.metadata["content_hash"] = chunk_id
+        hashed[chunk_id] = doc
+
+    return hashed
+
+
+def kb_version_for(chunk_ids) -> str:
+    return hashlib.sha256("\n".join(sorted(chunk_ids)).encode("utf-8")).hexdigest()
+
+
+def current_kb_version(db):
+
+    latest = db.query(KBVersion).order_by(KBVersion.id.desc()).first()
+
+    return latest.version if latest else None
+
+
+def resolve_kb_version():
+    """KB version the running process is serving"""
+
+    if Config.VECTOR_BACKEND == "memory":
+        from app.services.corpus import kb_corpus
+        return kb_corpus.version
+
+    db = sessionLocal()
+    try:
+        return current_kb_version(db)
+    finally:
+        db.close()
+
+
+def ingest_kb(db, vectorstore, docs, rebuild: bool = False, dry_run: bool = False):
+
+    hashed = assign_chunk_hashes(docs)
+
+    if rebuild and not dry_run:
+        vectorstore.delete_collection()
+        vectorstore.create_collection()
+        db.query(KBChunk).delete()
+        db.flush()
+
+    stored = {row.id: row.source for row in db.query(KBChunk.id, KBChunk.source)}
+
+    to_add = [chunk_id for chunk_id in hashed if chunk_id not in stored]
+    to_remove = [chunk_id for chunk_id in stored if chunk_id not in hashed]
+
+    version = kb_version_for(hashed.keys())
+
+    summary = {
+        "version": version,
+        "chunks": len(hashed),
+        "added": len(to_add),
+        "removed": len(to_remove),
+        "unchanged": len(hashed) - len(to_add),
+    }
+
+    if dry_run:
+        return summary
+
+    # Remove first so a failed embedding call never leaves stale + new rows side by side
+    if to_remove:
+        vectorstore.delete(ids=to_remove)
+        db.query(KBChunk).filter(KBChunk.id.in_(to_remove)).delete(synchronize_session=False)
+
+    if to_add:
+        vectorstore.add_documents([hashed[chunk_id] for chunk_id in to_add], ids=to_add)
+        db.add_all([
+            KBChunk(
+                id=chunk_id,
+                source=os.path.relpath(hashed[chunk_id].metadata.get("source", ""), KB_DIR),
+                created_at=datetime.utcnow(),
+            )
+            for chunk_id in to_add
+        ])
+
+    if current_kb_version(db) != version:
+        db.add(KBVersion(
+            version=version,
+            chunk_count=len(hashed),
+            added=len(to_add),
+            removed=len(to_remove),
+            created_at=datetime.utcnow(),
+        ))
+
+    db.commit()
+
+    return summary
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Incrementally embed the KB into the vector store.")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the collection and re-embed every chunk")
+    parser.add_argument("--dry-run", action="store_true", help="Report the diff without embedding anything")
+    args = parser.parse_args(argv)
+
+    if Config.VECTOR_BACKEND == "memory":
+        print("VECTOR_BACKEND=memory builds its index in process; nothing to ingest.")
+        return
+
+    from app.services.corpus import kb_corpus
+    from app.services.container import services
+
+    KBChunk.__table__.create(bind=engine, checkfirst=True)
+    KBVersion.__table__.create(bind=engine, checkfirst=True)
+
+    db = sessionLocal()
+    try:
+        summary = ingest_kb(db, services.vectorstore, kb_corpus.documents(), rebuild=args.rebuild, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    print(
+        f"KB version {summary['version'][:12]}: {summary['chunks']} chunks "
+        f"(+{summary['added']} / -{summary['removed']} / ={summary['unchanged']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
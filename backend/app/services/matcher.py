@@ -0,0 +1,146 @@
+import threading
+from collections import defaultdict, deque
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+
+class MatchSet:
+    """Every pattern group hit by one message"""
+
+    def __init__(self, hits: Dict[str, List[str]]):
+        self._hits = hits
+
+    def has(self, group: str) -> bool:
+        return group in self._hits
+
+    def any(self, *groups: str) -> bool:
+        return any(group in self._hits for group in groups)
+
+    def patterns(self, group: str) -> List[str]:
+        return self._hits.get(group, [])
+
+    @property
+    def groups(self):
+        return set(self._hits)
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton; one pass over the text finds every pattern"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern in patterns:
+            self._insert(pattern)
+
+        self._build_failure_links()
+
+    def _insert(self, pattern: str):
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+
+                if state == 0:
+                    continue
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> set:
+        found = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+
+        return found
+
+
+class KeywordMatcher:
+    """Pattern tables from guardrails, tiering, categorisation and the classifier
+    fast path compiled into one automaton.
+
+    Modules register their tables at import; the automaton is rebuilt lazily the
+    next time a message is matched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._automaton = None
+        self._groups_by_pattern = {}
+
+    def register(self, namespace: str, table: Dict[str, Iterable[str]]):
+        with self._lock:
+            for group, patterns in table.items():
+                self._tables[f"{namespace}.{group}"] = [p.lower() for p in patterns]
+            self._automaton = None
+        match_message.cache_clear()
+
+    def _compiled(self):
+        automaton = self._automaton
+        if automaton is not None:
+            return automaton
+
+        with self._lock:
+            if self._automaton is None:
+                groups_by_pattern = defaultdict(list)
+                for group, patterns in self._tables.items():
+                    for pattern in patterns:
+                        groups_by_pattern[pattern].append(group)
+
+                self._groups_by_pattern = dict(groups_by_pattern)
+                self._automaton = AhoCorasick(self._groups_by_pattern)
+
+            return self._automaton
+
+    def match(self, message: str) -> MatchSet:
+        automaton = self._compiled()
+
+        hits = defaultdict(list)
+        for pattern in automaton.find(message.lower()):
+            for group in self._groups_by_pattern[pattern]:
+                hits[group].append(pattern)
+
+        return MatchSet(dict(hits))
+
+    @property
+    def pattern_count(self):
+        return sum(len(patterns) for patterns in self._tables.values())
+
+
+keyword_matcher = KeywordMatcher()
+
+
+@lru_cache(maxsize=2048)
+def match_message(message: str) -> MatchSet:
+    """Shared match set: guardrails, tiering and categorisation all read the same
+    result for a message instead of each rescanning it"""
+    return keyword_matcher.match(message)
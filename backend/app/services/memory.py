@@ -1,91 +1,169 @@
 from datetime import datetime
+import uuid
+from sqlalchemy import select, true, false
+from sqlalchemy.dialects.postgresql import insert
 from app.models.db import ChatSessions, ChatMessages,KBReferences,GuardRails
+from app.services.rollup import record_session_created
+from app.services.history_cache import history_cache, format_history
+
+class SessionRef:
+    """The chat_sessions row a request works on, resolved once and passed down"""
+
+    __slots__ = ("id", "session_id", "user_id", "created")
+
+    def __init__(self, id, session_id, user_id, created=False):
+        self.id = id
+        self.session_id = session_id
+        self.user_id = user_id
+        self.created = created
+
 
 def get_or_create_session(db, session_id, user_id,user_role, context):
+    """Upsert the session in one round trip and return a SessionRef.
 
-    context_data = context.dict() if hasattr(context, "dict") else context
+    The CTE inserts the row unless `session_id` exists and the outer SELECT
+    falls back to the existing row. When two first messages race, the loser's
+    INSERT waits for the winner's commit and does nothing; its snapshot predates
+    that row, so it is read again with a fresh statement.
+    """
 
-    session = db.query(ChatSessions).filter_by(session_id=session_id).first()
+    context_data = context.dict() if hasattr(context, "dict") else context
+    created_at = datetime.utcnow()
 
-    if not session:
-        session = ChatSessions(
+    inserted = (
+        insert(ChatSessions)
+        .values(
             session_id=session_id,
-            user_id=user_id, 
+            user_id=user_id,
             user_role=user_role,
             context=context_data,
+            created_at=created_at,
+        )
+        .on_conflict_do_nothing(index_elements=[ChatSessions.session_id])
+        .returning(ChatSessions.id, ChatSessions.user_id)
+        .cte("inserted")
+    )
+
+    row = db.execute(
+        select(inserted.c.id, inserted.c.user_id, true().label("created"))
+        .union_all(
+            select(ChatSessions.id, ChatSessions.user_id, false())
+            .where(ChatSessions.session_id == session_id)
+        )
+        .limit(1)
+    ).first()
+
+    if row is None:
+        row = db.execute(
+            select(ChatSessions.id, ChatSessions.user_id, false())
+            .where(ChatSessions.session_id == session_id)
+        ).one()
+
+    id_, owner, created = row
+
+    if created:
+        record_session_created(db.connection(), created_at)
+        db.commit()
+
+    return SessionRef(id_, session_id, owner, created)
+
+
+class ChatTurn:
+    """Unit of work for one chat turn.
+
+    Messages, guardrail events and KB references are collected in memory and
+    written by `flush` in a single transaction. Message ids are assigned up front
+    so guardrail events can reference them before anything is inserted; SQLAlchemy
+    batches each table into one multi-row INSERT ... RETURNING on flush.
+    """
+
+    def __init__(self, session_db_id):
+        self.session_db_id = session_db_id
+        self.messages = []
+        self.guardrail_events = []
+        self.kb_references = []
+        self.flushed = False
+
+    def add_message(
+        self,
+        role,
+        content,
+        tier=None,
+        severity=None,
+        need_escalation=None,
+        confidence=None
+    ):
+        message = ChatMessages(
+            id=uuid.uuid4(),
+            session_id=self.session_db_id,
+            role=role,
+            content=content,
+            tier=tier,
+            severity=severity,
+            need_escalation=need_escalation,
+            confidence=confidence,
             created_at=datetime.utcnow()
         )
-        db.add(session)
+
+        self.messages.append(message)
+
+        return message
+
+    def add_guardrail_event(self, message_id, blocked, reason=None):
+        self.guardrail_events.append(GuardRails(
+            session_id=self.session_db_id,
+            message_id=message_id,
+            blocked=blocked,
+            reason=reason,
+            created_at=datetime.utcnow()
+        ))
+
+    def add_kb_references(self, docs):
+        for doc in docs:
+            self.kb_references.append(KBReferences(
+                session_id=self.session_db_id,
+                kb_id=doc.metadata.get("id") or doc.metadata.get("source"),
+                title=doc.metadata.get("title", "Unknown Document"),
+                created_at=datetime.utcnow()
+            ))
+
+    def flush(self, db):
+        """Write everything collected so far, plus any pending tickets on `db`, with one commit"""
+
+        # Read before commit: committing expires the loaded attributes
+        history = [(_role(message.role), message.content) for message in self.messages]
+
+        db.add_all(self.messages)
+        db.add_all(self.guardrail_events)
+        db.add_all(self.kb_references)
         db.commit()
-        db.refresh(session)
-
-    return session
-
-
-def save_message(
-    db,
-    session_db_id,
-    role,
-    content,
-    tier=None,
-    severity=None,
-    need_escalation=None,
-    confidence=None
-):
-    message = ChatMessages(
-        session_id=session_db_id,
-        role=role,
-        content=content,
-        tier=tier,
-        severity=severity,
-        need_escalation=need_escalation,
-        confidence=confidence,
-        created_at=datetime.utcnow()
-    )
 
-    db.add(message)
-    db.commit()
-    db.refresh(message)
+        self.flushed = True
+        history_cache.append(self.session_db_id, history)
 
-    return message
 
-def load_chat_history(db, session_db_id, limit: int = 10):
+def _role(role):
+    return getattr(role, "value", role)
 
-    messages = (
-        db.query(ChatMessages)
-        .filter_by(session_id=session_db_id)
-        .order_by(ChatMessages.created_at.desc()) 
-        .limit(limit)
-        .all()
-    )
 
-    messages.reverse()
+def load_chat_history(db, session_db_id, limit: int = 10):
 
-    history_text = "\n".join(
-        f"{msg.role}: {msg.content}" for msg in messages
-    )
+    cached = history_cache.history_text(session_db_id, limit)
+    if cached is not None:
+        return cached
 
-    return history_text
+    since = history_cache.sequence
 
-def save_guardrail_event(db, session_id, message_id, blocked, reason=None):
-    event = GuardRails(
-        session_id=session_id,   
-        message_id=message_id,   
-        blocked=blocked,
-        reason=reason
+    # Read enough to fill the whole ring buffer, return the last `limit`
+    messages = (
+        db.query(ChatMessages.role, ChatMessages.content)
+        .filter_by(session_id=session_db_id)
+        .order_by(ChatMessages.created_at.desc())
+        .limit(max(limit, history_cache.depth))
+        .all()
     )
-    db.add(event)
-    db.commit()
-    db.refresh(event)
 
-def save_kb_references(db, session_db_id, docs):
+    messages = [(_role(role), content) for role, content in reversed(messages)]
+    history_cache.fill(session_db_id, messages, since)
 
-    for doc in docs:
-        kb_ref = KBReferences(
-            session_id=session_db_id,   
-            kb_id=doc.metadata.get("id") or doc.metadata.get("source"),
-            title=doc.metadata.get("title", "Unknown Document")
-        )
-        db.add(kb_ref)
-        db.commit()
-        db.refresh(kb_ref)
+    return format_history(messages[-limit:] if limit else [])
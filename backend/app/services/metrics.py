@@ -1,42 +1,53 @@
-from sqlalchemy import func
-from app.models.db import Ticket,GuardRails,ChatSessions,ChatMessages,TicketStatus
+from sqlalchemy import func, select, union_all, literal, null, cast, String
+from app.models.db import Ticket,GuardRails,ChatSessions,ChatMessages,TicketStatus,ticket_category
 from datetime import datetime, timedelta
-from collections import defaultdict
+import hashlib
+import json
+import threading
+import time
+from app.config import Config
+from app.services.rollup import live_counters, rollup_counters
 
 def metrics_summary(db):
 
-    # Ticket Metrics
-    total_tickets = db.query(func.count(Ticket.id)).scalar()
-
-    open_tickets = db.query(func.count(Ticket.id)).filter(Ticket.status == TicketStatus.OPEN).scalar()
-
-    closed_tickets = db.query(func.count(Ticket.id)).filter(Ticket.status == TicketStatus.RESOLVED).scalar()
+    # Daily rollup when enabled (O(days)); otherwise one FILTER-aggregated scan per table
+    counters = rollup_counters(db) if Config.METRICS_ROLLUP_ENABLED else live_counters(db)
 
-    severity_rows = db.query(Ticket.severity,func.count(Ticket.id)).group_by(Ticket.severity).all()
+    def count(name):
+        return int(counters.get(name) or 0)
 
-    tickets_by_severity = {row[0].value: row[1] for row in severity_rows}
-
-    tier_rows = db.query(Ticket.tier,func.count(Ticket.id)).group_by(Ticket.tier).all()
+    def breakdown(prefix):
+        return {
+            name[len(prefix):]: int(value)
+            for name, value in counters.items()
+            if name.startswith(prefix) and value
+        }
 
-    tickets_by_tier = {row[0].value: row[1] for row in tier_rows}
+    # Ticket Metrics
+    total_tickets = count("tickets")
+    open_tickets = count(f"tickets.status.{TicketStatus.OPEN.value}")
+    closed_tickets = count(f"tickets.status.{TicketStatus.RESOLVED.value}")
 
-    guardrail_hits = db.query(func.count(GuardRails.id)).filter(GuardRails.blocked == True).scalar()
+    tickets_by_severity = breakdown("tickets.severity.")
+    tickets_by_tier = breakdown("tickets.tier.")
 
-    escalation_count = db.query(func.count(ChatMessages.id)).filter(ChatMessages.need_escalation == True).scalar()
+    guardrail_hits = count("guardrail.blocked")
+    escalation_count = count("messages.escalation")
 
-    total_sessions = db.query(func.count(ChatSessions.id)).scalar()
-    total_messages = db.query(func.count(ChatMessages.id)).scalar()
+    total_sessions = count("sessions")
+    total_messages = count("messages")
 
     total_conversations = total_messages/2
 
-    avg_confidence = db.query(func.avg(ChatMessages.confidence)).filter(ChatMessages.role == "assistant"   ).scalar()
+    confidence_count = count("assistant.confidence_count")
+    avg_confidence = float(counters.get("assistant.confidence_sum") or 0) / confidence_count if confidence_count else 0
 
     avg_confidence = round(avg_confidence, 3) if avg_confidence else 0
 
     # Deflection Rate
     deflection_rate = 0
     if total_sessions:
-        sessions_with_tickets = db.query(func.count(func.distinct(Ticket.session_id))).scalar()
+        sessions_with_tickets = count("sessions.ticketed")
 
         deflected_sessions = total_sessions - sessions_with_tickets
         deflection_rate = round(deflected_sessions / total_sessions, 3)
@@ -60,81 +71,167 @@ def metrics_summary(db):
 
 
 
+TREND_SERIES = ("tickets", "guardrails", "escalations", "sessions", "messages")
+
+
+def trend_rows(db, start_day):
+    """Per-day counts for every trend series since `start_day`, in one statement.
+
+    Tickets and messages are each scanned once in a CTE; guardrail events and
+    sessions are grouped directly. Rows are (series, day, category, count).
+    """
+
+    since = datetime.combine(start_day, datetime.min.time())
+    no_category = cast(null(), String).label("category")
+
+    ticket_days = select(
+        func.date(Ticket.created_at).label("day"),
+        ticket_category.label("category"),
+    ).where(Ticket.created_at >= since).cte("ticket_days")
+
+    message_days = select(
+        func.date(ChatMessages.created_at).label("day"),
+        func.count(ChatMessages.id).label("messages"),
+        func.count(ChatMessages.id).filter(ChatMessages.need_escalation.is_(True)).label("escalations"),
+    ).where(ChatMessages.created_at >= since).group_by(func.date(ChatMessages.created_at)).cte("message_days")
+
+    guardrail_day = func.date(GuardRails.created_at)
+    session_day = func.date(ChatSessions.created_at)
+
+    query = union_all(
+        select(literal("tickets").label("series"), ticket_days.c.day, no_category, func.count().label("count"))
+        .group_by(ticket_days.c.day),
+        select(literal("categories"), ticket_days.c.day, ticket_days.c.category, func.count())
+        .where(ticket_days.c.category.isnot(None), ticket_days.c.category != "")
+        .group_by(ticket_days.c.day, ticket_days.c.category),
+        select(literal("messages"), message_days.c.day, no_category, message_days.c.messages),
+        select(literal("escalations"), message_days.c.day, no_category, message_days.c.escalations)
+        .where(message_days.c.escalations > 0),
+        select(literal("guardrails"), guardrail_day, no_category, func.count(GuardRails.id))
+        .where(GuardRails.created_at >= since).group_by(guardrail_day),
+        select(literal("sessions"), session_day, no_category, func.count(ChatSessions.id))
+        .where(ChatSessions.created_at >= since).group_by(session_day),
+    )
+
+    return db.execute(query).all()
+
+
+def empty_bucket():
+    bucket = {series: 0 for series in TREND_SERIES}
+    bucket["categories"] = {}
+    return bucket
+
+
+class TrendsCache:
+    """Per-day trend buckets.
+
+    Past UTC days are cached for good (up to `max_days` of them); only today's
+    bucket is recomputed, at most every `today_ttl` seconds. A request for a
+    longer window queries just the days it is missing, in one statement.
+    """
+
+    def __init__(self, today_ttl: float, max_days: int):
+        self.today_ttl = today_ttl
+        self.max_days = max_days
+
+        self._lock = threading.Lock()
+        self._past = {}
+        self._today = None
+        self._today_bucket = None
+        self._today_loaded = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def buckets(self, db, start_day, today):
+        with self._lock:
+            days = [start_day + timedelta(days=n) for n in range((today - start_day).days + 1)]
+            missing = [day for day in days[:-1] if day not in self._past]
+
+            today_fresh = (
+                self._today == today
+                and time.monotonic() - self._today_loaded < self.today_ttl
+            )
+
+            if missing or not today_fresh:
+                self.misses += 1
+                self._load(db, missing[0] if missing else today, today)
+            else:
+                self.hits += 1
+
+            return [(day, self._today_bucket if day == today else self._past[day]) for day in days]
+
+    def _load(self, db, first_day, today):
+        loaded = {first_day + timedelta(days=n): empty_bucket() for n in range((today - first_day).days + 1)}
+
+        for series, day, category, count in trend_rows(db, first_day):
+            bucket = loaded.get(day)
+            if bucket is None:
+                continue
+            if series == "categories":
+                bucket["categories"][category] = count
+            else:
+                bucket[series] = count
+
+        self._today_bucket = loaded.pop(today)
+        self._today = today
+        self._today_loaded = time.monotonic()
+
+        self._past.update(loaded)
+        for day in sorted(self._past)[:-self.max_days]:
+            del self._past[day]
+
+    def clear(self):
+        with self._lock:
+            self._past.clear()
+            self._today = None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "daysCached": len(self._past),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+        }
+
+
+trends_cache = TrendsCache(
+    today_ttl=Config.TRENDS_TODAY_TTL_SECONDS,
+    max_days=Config.TRENDS_MAX_DAYS,
+)
+
+
 def metrics_trends(db, days: int = 7):
 
-    since = datetime.utcnow() - timedelta(days=days)
-
-    tickets_trend = db.query(
-        func.date(Ticket.created_at),
-        func.count(Ticket.id)
-    ).filter(Ticket.created_at >= since) \
-     .group_by(func.date(Ticket.created_at)) \
-     .all()
-
-    guardrail_trend = db.query(
-        func.date(GuardRails.created_at),
-        func.count(GuardRails.id)
-    ).filter(GuardRails.created_at >= since) \
-     .group_by(func.date(GuardRails.created_at)) \
-     .all()
-
-    escalation_trend = db.query(
-        func.date(ChatMessages.created_at),
-        func.count(ChatMessages.id)
-    ).filter(
-        ChatMessages.created_at >= since,
-        ChatMessages.need_escalation == True
-    ).group_by(func.date(ChatMessages.created_at)) \
-     .all()
-    
-    sessions_trend = db.query(
-        func.date(ChatSessions.created_at),
-        func.count(ChatSessions.id)
-    ).filter(ChatSessions.created_at >= since) \
-     .group_by(func.date(ChatSessions.created_at)) \
-     .all()
-
-    messages_trend = db.query(
-        func.date(ChatMessages.created_at),
-        func.count(ChatMessages.id)
-    ).filter(ChatMessages.created_at >= since) \
-     .group_by(func.date(ChatMessages.created_at)) \
-     .all()
-    
-    category_trend_rows = db.query(
-        func.date(Ticket.created_at),
-        func.jsonb_extract_path_text(Ticket.ai_results, 'category').label("category"),
-        func.count(Ticket.id)
-    ).filter(
-        Ticket.created_at >= since,
-        Ticket.ai_results.isnot(None)
-    ).group_by(
-        func.date(Ticket.created_at),
-        "category"
-    ).all()
-
-    category_trend_map = defaultdict(lambda: defaultdict(int))
-
-    for date, category, count in category_trend_rows:
-        if category:
-            category_trend_map[str(date)][category] = count
+    now = datetime.utcnow()
+    buckets = trends_cache.buckets(db, (now - timedelta(days=days)).date(), now.date())
+
+    def series(name):
+        return [{"date": str(day), "count": bucket[name]} for day, bucket in buckets if bucket[name]]
 
     category_trend = [
         {
-            "date": date,
-            "categories": dict(categories)
+            "date": str(day),
+            "categories": dict(bucket["categories"])
         }
-        for date, categories in category_trend_map.items()
+        for day, bucket in buckets
+        if bucket["categories"]
     ]
 
     return {
-        "tickets": [{"date": str(row[0]), "count": row[1]} for row in tickets_trend],
-        "guardrails": [{"date": str(row[0]), "count": row[1]} for row in guardrail_trend],
-        "escalations": [{"date": str(row[0]), "count": row[1]} for row in escalation_trend],
+        "tickets": series("tickets"),
+        "guardrails": series("guardrails"),
+        "escalations": series("escalations"),
         "conversationVolumes": {
-            "sessions": [{"date": str(row[0]), "count": row[1]} for row in sessions_trend],
-            "messages": [{"date": str(row[0]), "count": row[1]} for row in messages_trend],
+            "sessions": series("sessions"),
+            "messages": series("messages"),
         },
 
         "issueCategories": category_trend
-    }
\ No newline at end of file
+    }
+
+
+def payload_etag(payload) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+
+def encode_cursor(sort: str, value: datetime | None, row_id) -> str:
+    payload = json.dumps([sort, value.isoformat() if value is not None else None, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """(sort value or None, id) from a cursor issued for the same sort order; 400 otherwise"""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        value = datetime.fromisoformat(value) if value is not None else None
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+    if cursor_sort != sort:
+        raise HTTPException(400, "Cursor was issued for a different sort order")
+
+    return value, row_id
+
+
+def after_cursor(sort_column, id_column, value, row_id, descending: bool):
+    """Rows that follow (value, row_id) in PostgreSQL's default NULL placement:
+    NULL sort values come last in ascending order and first in descending order"""
+
+    if descending:
+        if value is None:
+            return or_(and_(sort_column.is_(None), id_column < row_id), sort_column.is_not(None))
+        return tuple_(sort_column, id_column) < tuple_(value, row_id)
+
+    if value is None:
+        return and_(sort_column.is_(None), id_column > row_id)
+    return or_(tuple_(sort_column, id_column) > tuple_(value, row_id), sort_column.is_(None))
+
+
+def keyset_page(query, sort: str, sort_column, id_column, cursor: str | None, limit: int):
+    """Order by (sort_column, id), continue after `cursor` and fetch one extra row
+    to know whether another page follows. `sort` is the column name, prefixed
+    with "-" for descending order."""
+
+    descending = sort.startswith("-")
+
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort)
+        query = query.filter(after_cursor(sort_column, id_column, value, row_id, descending))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    return query.limit(limit + 1)
@@ -1,26 +1,30 @@
-from langchain_openai import ChatOpenAI
+import asyncio
+import logging
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser, PydanticOutputParser
+from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
 from langchain_core.runnables import RunnableLambda
 from app.services.tickets import create_ticket_if_needed
 from app.services.prompts import PROMPT_TEMPLATE, CLASSIFICATION_PROMPT_TEMPLATE
-from app.services.embeddings import vectorstore
-from app.models.schemas import ChatRequest, ChatResponse, GuardRail
-from sqlalchemy.orm import Session
+from app.services.container import services
+from app.services.answer_cache import answer_cache
+from app.services.retrieval import doc_key
+from app.services.retrieval_cache import retrieval_cache
+from app.services.single_flight import message_key, single_flight
+from app.services.fast_path import rule_classifier
+from app.services.context_builder import build_context, count_message_tokens, token_stats
+from app.config import Config
+from app.models.schemas import ChatRequest, ChatResponse, GuardRail, KBReference
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.tier_service import TierService
 from app.services.guardrails import evaluate_guardrails, validate_kb_grounding
-from app.services.memory import get_or_create_session, save_message, load_chat_history, save_guardrail_event, save_kb_references
+from app.services.memory import SessionRef, load_chat_history, ChatTurn
 from app.services.role_policy import apply_role_constraints, adjust_answer_for_role, role_guardrail_message
 from dotenv import load_dotenv
 load_dotenv()
 
-tier_service = TierService()
+logger = logging.getLogger(__name__)
 
-retriever = vectorstore.as_retriever(
-    search_type="mmr",
-    search_kwargs={"k": 3, "lambda_mult": 0.25},
-    include_metadata=True
-)
+tier_service = TierService()
 
 parser = PydanticOutputParser(pydantic_object=ChatResponse)
 format_instructions = parser.get_format_instructions()
@@ -36,25 +40,96 @@ prompt = ChatPromptTemplate.from_messages([
 ])
 
 def format_docs(docs):
-    formatted = []
+    context, counts = build_context(docs)
 
-    for doc in docs:
-        source = doc.metadata.get("source", "unknown")
-        doc_id = doc.metadata.get("id", source)
+    token_stats.observe("context", counts.pop("contextTokens"))
+    token_stats.count(counts)
+
+    return context
+
+
+def count_prompt_tokens(name):
+    """Pass-through step after a prompt that records how many tokens it renders to"""
+
+    def record(prompt_value):
+        tokens = count_message_tokens(prompt_value.to_messages())
+        token_stats.observe(name, tokens)
+        logger.debug("%s prompt: %d tokens", name, tokens)
+        return prompt_value
+
+    return RunnableLambda(record)
+
+async def invoke_coalesced(name, chain, inputs, key):
+    """`chain.ainvoke(inputs)`, shared with concurrent requests that have the same key.
+
+    Every caller gets its own copy of the response, since the turn mutates it.
+    """
 
-        formatted.append(
-            f"[ID: {doc_id} | SOURCE: {source}]\n{doc.page_content}"
+    if not Config.SINGLE_FLIGHT_ENABLED:
+        return await chain.ainvoke(inputs)
+
+    response = await single_flight.run(name, key, lambda: chain.ainvoke(inputs))
+    return response.model_copy(deep=True)
+
+
+async def classify_answer(request: ChatRequest, answer: str, history_text: str) -> ChatResponse:
+    """Escalation signal for this turn: keyword rules first, LLM only when they are not decisive"""
+
+    decision = None
+    if Config.CLASSIFIER_FAST_PATH != "off":
+        decision = rule_classifier.decide(request.message, answer, history_text)
+
+    if decision and Config.CLASSIFIER_FAST_PATH == "on":
+        rule_classifier.record_skip()
+        return ChatResponse(
+            answer=answer,
+            needEscalation=decision["needEscalation"],
+            confidence=decision["confidence"],
         )
 
-    return "\n\n".join(formatted)
+    classification: ChatResponse = await invoke_coalesced("classify", services.classify_chain, {
+        "message": request.message,
+        "answer": answer,
+        "history": history_text,
+    }, (message_key(request.message), answer, history_text))
+
+    if decision:
+        rule_classifier.record_shadow(decision, classification.needEscalation)
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+    return classification
+
+
+def kb_references_from_docs(docs):
+    references = []
+    seen = set()
+
+    for doc in docs:
+        kb_id = doc.metadata.get("id") or doc.metadata.get("source")
+        if kb_id in seen:
+            continue
+        seen.add(kb_id)
+        references.append(KBReference(id=kb_id, title=doc.metadata.get("title", "Unknown Document")))
+
+    return references
+
+
+def rag_inputs():
+    # Documents are retrieved once per chat turn and passed in as "docs"
+    return {
+        "context": RunnableLambda(lambda x: format_docs(x["docs"])),
+        "message": RunnableLambda(lambda x: x["message"]),
+        "role": RunnableLambda(lambda x: x["role"]),
+    }
+
+
+def build_rag_chain(llm):
+    return rag_inputs() | prompt | count_prompt_tokens("rag") | llm | parser
+
+
+def build_rag_stream_chain(llm):
+    # Same prompt, but yields partial JSON objects so "answer" can be streamed as it grows
+    return rag_inputs() | prompt | count_prompt_tokens("rag") | llm | JsonOutputParser()
 
-rag_chain = {
-    "context": RunnableLambda(lambda x: x["message"]) |retriever | format_docs,
-    "message": RunnableLambda(lambda x: x["message"]),
-    "role": RunnableLambda(lambda x: x["role"]),
-} | prompt | llm | parser
 
 classification_parser = PydanticOutputParser(pydantic_object=ChatResponse)
 format_instructions_classify = classification_parser.get_format_instructions()
@@ -68,43 +143,73 @@ prompt_classification = ChatPromptTemplate.from_messages([
     ("user", "Support Request:{message}\n\nGenerated Answer: {answer}\n\nConversation History: {history}")
 ])
 
-classify_chain = (
-    prompt_classification
-    | llm
-    | classification_parser
-)
+def build_classify_chain(llm):
+    return (
+        prompt_classification
+        | count_prompt_tokens("classify")
+        | llm
+        | classification_parser
+    )
 
 
-def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
+async def ask_question(request: ChatRequest, db: AsyncSession, session: SessionRef) -> ChatResponse:
 
-    # SESSION 
-    session = get_or_create_session(
-        db=db,
-        session_id=request.session_id,
-        user_id=request.user_id,
-        user_role=request.user_role,
-        context=request.context,
-    )
+    response = None
+
+    async for event, payload in chat_turn(request, db, session):
+        if event == "final":
+            response = payload
+
+    return response
+
+
+async def chat_turn(request: ChatRequest, db: AsyncSession, session: SessionRef, stream: bool = False):
+    """Run one chat turn, yielding ("token", text) while streaming and ("final", ChatResponse) last.
+
+    `session` is resolved once per request by the route (see routes/chat.py).
+    """
+
+    # Persistence helpers in memory.py / tickets.py take a sync Session; run_sync
+    # executes them on the AsyncSession's connection without blocking the loop.
+
+    # Every row for this turn is written by a single commit at the end
+    turn = ChatTurn(session.id)
+
+    try:
+        async for event in _answer_turn(request, db, session, turn, stream):
+            yield event
+
+    except BaseException:
+        # Keep the user's message and guardrail audit even when generation fails,
+        # or when a streaming client disconnects (CancelledError / GeneratorExit)
+        if not turn.flushed:
+            await asyncio.shield(_save_partial_turn(db, turn))
+        raise
+
+
+async def _save_partial_turn(db: AsyncSession, turn: ChatTurn):
+    try:
+        await db.rollback()
+        await db.run_sync(turn.flush)
+    except Exception:
+        logger.exception("Could not save the partial chat turn for session %s", turn.session_db_id)
+
+
+async def _answer_turn(request: ChatRequest, db: AsyncSession, session, turn: ChatTurn, stream: bool):
 
     # SAVE USER MESSAGE 
-    user_msg = save_message(
-        db=db,
-        session_db_id=session.id,
+    user_msg = turn.add_message(
         role="user",
         content=request.message,
     )
 
-    db.flush()
-
     # GUARDRAILS 
     guardrail_result = evaluate_guardrails(
         message=request.message,
         user_role=request.user_role,
     )
 
-    save_guardrail_event(
-        db=db,
-        session_id=session.id,
+    turn.add_guardrail_event(
         message_id=user_msg.id,
         blocked=guardrail_result["blocked"],
         reason=guardrail_result.get("reason"),
@@ -128,8 +233,8 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
         )
 
         # CREATE TICKET FOR ESCALATED GUARDRail
-        ticket = create_ticket_if_needed(
-            db=db,
+        ticket = await db.run_sync(
+            create_ticket_if_needed,
             session=session,
             request=request,
             response=response,
@@ -138,9 +243,7 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
         if ticket:
             response.ticketId = ticket.id
 
-        assistant_msg = save_message(
-            db=db,
-            session_db_id=session.id,
+        assistant_msg = turn.add_message(
             role="assistant",
             content=response.answer,
             tier=response.tier,
@@ -149,70 +252,148 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
             confidence=response.confidence,
         )
 
-        db.flush()
-
-        save_guardrail_event(
-            db=db,
-            session_id=session.id,
+        turn.add_guardrail_event(
             message_id=assistant_msg.id,
             blocked=False,
         )
 
-        db.commit()
-        return response
-
-    # RETRIEVE DOCS
-    retrieved_docs = retriever.invoke(request.message)
-
-    save_kb_references(db, session.id, retrieved_docs)
-
-    if not validate_kb_grounding(retrieved_docs):
-
-        response = ChatResponse(
-            answer="This information is not available in the knowledge base. I’ll escalate this to support.",
-            confidence=1.0,
-            tier="TIER_2",
-            severity="MEDIUM",
-            needEscalation=True,
-            guardrail={
-                "blocked": False,
-                "reason": "No KB grounding",
-            },
-            kbReferences=[],
-        )
-
-        ticket = create_ticket_if_needed(db, session, request, response)
-
-        if ticket:
-            response.ticketId = ticket.id
-
-        assistant_msg = save_message(
-            db=db,
-            session_db_id=session.id,
-            role="assistant",
-            content=response.answer,
-            tier=response.tier,
-            severity=response.severity,
-            need_escalation=response.needEscalation,
-            confidence=response.confidence,
-        )
-
-        db.commit()
-        return response
-
-    # RAG ANSWER 
-    rag_response: ChatResponse = rag_chain.invoke({
-        "message": request.message,
-        "role": request.user_role,
-    })
-
-    history_text = load_chat_history(db, session.id, limit=10)
-
-    classification: ChatResponse = classify_chain.invoke({
-        "message": request.message,
-        "answer": rag_response.answer,
-        "history": history_text,
-    })
+        await db.run_sync(turn.flush)
+
+        if stream:
+            yield "token", response.answer
+        yield "final", response
+        return
+
+    # SEMANTIC ANSWER CACHE
+    # Keyword-heavy queries (error codes, paths) are answered from BM25 with no
+    # embedding call; they also skip the semantic cache, where "KE-2001" and
+    # "KE-3001" would look like the same question.
+    retriever = services.retriever
+    cached = None
+    query_vector = None
+    kb_version = services.kb_version()
+    use_answer_cache = Config.ANSWER_CACHE_ENABLED and not retriever.is_lexical_query(request.message)
+
+    # A rephrasing of an earlier query ("vpn not connecting!!") reuses its
+    # ranked chunks and query vector: no embedding call, no vector search
+    cached_retrieval = None
+    if Config.RETRIEVAL_CACHE_ENABLED:
+        cached_retrieval = retrieval_cache.lookup(request.message, kb_version)
+        if cached_retrieval:
+            query_vector = cached_retrieval[1]
+
+    if use_answer_cache:
+        if query_vector is None:
+            query_vector = await retriever.aembed_query(request.message)
+        cached = answer_cache.lookup(query_vector, request.user_role, kb_version)
+
+    if cached:
+        retrieved_docs = cached["docs"]
+        turn.add_kb_references(retrieved_docs)
+
+        rag_response: ChatResponse = cached["answer"].model_copy(deep=True)
+
+        if stream:
+            yield "token", adjust_answer_for_role(rag_response.answer, request.user_role)
+
+        # Escalation depends on this session's history, so it is never replayed
+        history_text = await db.run_sync(load_chat_history, session.id, limit=10)
+
+    else:
+        # RETRIEVE DOCS + HISTORY (independent, run concurrently)
+        if cached_retrieval:
+            retrieved_docs = cached_retrieval[0]
+            history_text = await db.run_sync(load_chat_history, session.id, limit=10)
+
+        else:
+            retrieved_docs, history_text = await asyncio.gather(
+                retriever.aretrieve(request.message, query_vector=query_vector),
+                db.run_sync(load_chat_history, session.id, limit=10),
+            )
+
+            if Config.RETRIEVAL_CACHE_ENABLED:
+                retrieval_cache.store(request.message, kb_version, retrieved_docs, query_vector)
+
+        if not validate_kb_grounding(retrieved_docs):
+
+            response = ChatResponse(
+                answer="This information is not available in the knowledge base. I’ll escalate this to support.",
+                confidence=1.0,
+                tier="TIER_2",
+                severity="MEDIUM",
+                needEscalation=True,
+                guardrail={
+                    "blocked": False,
+                    "reason": "No KB grounding",
+                },
+                kbReferences=[],
+            )
+
+            ticket = await db.run_sync(create_ticket_if_needed, session, request, response)
+
+            if ticket:
+                response.ticketId = ticket.id
+
+            turn.add_message(
+                role="assistant",
+                content=response.answer,
+                tier=response.tier,
+                severity=response.severity,
+                need_escalation=response.needEscalation,
+                confidence=response.confidence,
+            )
+
+            await db.run_sync(turn.flush)
+
+            if stream:
+                yield "token", response.answer
+            yield "final", response
+            return
+
+        turn.add_kb_references(retrieved_docs)
+
+        # RAG ANSWER
+        chain_input = {
+            "message": request.message,
+            "role": request.user_role,
+            "docs": retrieved_docs,
+        }
+
+        if stream:
+            # Role framing is a fixed prefix, so it can go out before the first token
+            prefix = adjust_answer_for_role("", request.user_role)
+            if prefix:
+                yield "token", prefix
+
+            streamed = ""
+            partial = {}
+
+            async for partial in services.rag_stream_chain.astream(chain_input):
+                answer = partial.get("answer") if isinstance(partial, dict) else None
+                if isinstance(answer, str) and len(answer) > len(streamed):
+                    yield "token", answer[len(streamed):]
+                    streamed = answer
+
+            rag_response = ChatResponse.model_validate(partial)
+
+        else:
+            # A class hitting the same broken lab sends the same question at once
+            rag_response: ChatResponse = await invoke_coalesced("rag", services.rag_chain, chain_input, (
+                message_key(request.message),
+                request.user_role.lower(),
+                tuple(doc_key(doc) for doc in retrieved_docs),
+            ))
+
+        rag_response.kb_references = kb_references_from_docs(retrieved_docs)
+
+        if use_answer_cache:
+            answer_cache.store(query_vector, request.user_role, kb_version, {
+                "docs": retrieved_docs,
+                "answer": rag_response.model_copy(deep=True),
+            })
+
+    # CLASSIFICATION: per session, also on an answer cache hit
+    classification = await classify_answer(request, rag_response.answer, history_text)
 
     # APPLY CLASSIFICATION
     kb_grounded = True 
@@ -246,8 +427,8 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
         rag_response.tier = "TIER_2"
 
     # TICKET CREATION
-    ticket = create_ticket_if_needed(
-        db=db,
+    ticket = await db.run_sync(
+        create_ticket_if_needed,
         session=session,
         request=request,
         response=rag_response,
@@ -268,9 +449,7 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
     )
 
     # SAVE ASSISTANT MESSAGE
-    save_message(
-        db=db,
-        session_db_id=session.id,
+    turn.add_message(
         role="assistant",
         content=rag_response.answer,
         tier=rag_response.tier,
@@ -279,5 +458,6 @@ def ask_question(request: ChatRequest, db: Session) -> ChatResponse:
         confidence=rag_response.confidence,
     )
 
-    db.commit()
-    return rag_response
\ No newline at end of file
+    await db.run_sync(turn.flush)
+
+    yield "final", rag_response
@@ -0,0 +1,209 @@
+import math
+import re
+import time
+from collections import Counter, defaultdict
+import numpy as np
+from langchain_core.documents import Document
+from app.services.stats import LatencyStats
+
+# Compound tokens ("ke-2001", "etc/hosts", "startup.sh") are kept whole and also
+# split into their parts, so exact identifiers and plain words both match
+TOKEN_RE = re.compile(r"[a-z0-9_]+(?:[./:-][a-z0-9_]+)*")
+PART_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "the", "this", "to",
+    "what", "when", "where", "why", "with", "you",
+}
+
+
+def tokenize(text: str):
+    tokens = []
+
+    for token in TOKEN_RE.findall(text.lower()):
+        parts = PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(p for p in parts if p not in STOPWORDS)
+
+    return tokens
+
+
+def is_exact_token(token: str) -> bool:
+    """Error codes, paths and file names: tokens an embedding tends to blur.
+
+    A hyphen alone does not make an identifier: "step-by-step" and
+    "self-service" are ordinary words, "ke-2001" counts for its digits.
+    """
+    if len(token) < 4:
+        return False
+    if any(c in "./:_" for c in token):
+        return True
+    return any(c.isdigit() for c in token) and any(c.isalpha() for c in token)
+
+
+def doc_key(doc: Document):
+    return doc.metadata.get("content_hash") or doc.page_content
+
+
+class BM25Index:
+    """In-memory inverted index over KB chunks with Okapi BM25 scoring"""
+
+    def __init__(self, docs, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = list(docs)
+
+        postings = defaultdict(lambda: ([], []))
+        lengths = []
+
+        for idx, doc in enumerate(self.docs):
+            counts = Counter(tokenize(doc.page_content))
+            lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                doc_ids, tfs = postings[token]
+                doc_ids.append(idx)
+                tfs.append(tf)
+
+        self._lengths = np.asarray(lengths, dtype=np.float32)
+        avg_length = float(self._lengths.mean()) if len(lengths) else 1.0
+        self._length_norm = k1 * (1 - b + b * self._lengths / max(avg_length, 1.0))
+
+        total = len(self.docs)
+        self._postings = {}
+        for token, (doc_ids, tfs) in postings.items():
+            df = len(doc_ids)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            self._postings[token] = (
+                np.asarray(doc_ids, dtype=np.int32),
+                np.asarray(tfs, dtype=np.float32),
+                idf,
+            )
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, token):
+        return token in self._postings
+
+    def search(self, query: str, k: int = 10):
+        """Top-k (doc, score) pairs; documents sharing no term with the query are dropped"""
+
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+
+        for token in set(tokenize(query)):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            doc_ids, tfs, idf = posting
+            scores[doc_ids] += idf * tfs * (self.k1 + 1) / (tfs + self._length_norm[doc_ids])
+
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+
+        k = min(k, len(hits))
+        top = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        return [(self.docs[i], float(scores[i])) for i in top]
+
+
+def reciprocal_rank_fusion(rankings, k: int, rrf_k: int = 60):
+    """Fuse ranked document lists: score(d) = sum(1 / (rrf_k + rank))"""
+
+    scores = defaultdict(float)
+    docs = {}
+
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc_key(doc)
+            scores[key] += 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [docs[key] for key in ordered[:k]]
+
+
+retrieval_stats = LatencyStats()
+
+
+class HybridRetriever:
+    """BM25 and vector MMR candidates fused with reciprocal rank fusion.
+
+    Modes: "hybrid" always fuses, "vector" is the previous MMR-only retriever,
+    "lexical" never embeds, and "auto" answers keyword-heavy queries (error
+    codes, paths, file names the index knows) from BM25 alone and fuses the rest.
+    """
+
+    def __init__(self, lexical: BM25Index, vectorstore=None, mode: str = "auto", k: int = 3,
+                 candidates: int = 10, rrf_k: int = 60, lambda_mult: float = 0.25):
+        self.lexical = lexical
+        self.vectorstore = vectorstore
+        self.mode = mode
+        self.k = k
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.lambda_mult = lambda_mult
+
+    def is_lexical_query(self, query: str) -> bool:
+        if self.mode == "lexical" or self.vectorstore is None:
+            return True
+        if self.mode != "auto":
+            return False
+        return any(is_exact_token(t) and t in self.lexical for t in tokenize(query))
+
+    def _lexical_search(self, query: str, k: int):
+        started = time.perf_counter()
+        hits = self.lexical.search(query, k)
+        retrieval_stats.observe("lexical", time.perf_counter() - started)
+        return [doc for doc, _ in hits]
+
+    async def aembed_query(self, query: str):
+        started = time.perf_counter()
+        vector = await self.vectorstore.embeddings.aembed_query(query)
+        retrieval_stats.observe("embed", time.perf_counter() - started)
+        return vector
+
+    async def _vector_search(self, query_vector, k: int):
+        started = time.perf_counter()
+        docs = await self.vectorstore.amax_marginal_relevance_search_by_vector(
+            query_vector, k=k, fetch_k=max(20, 2 * k), lambda_mult=self.lambda_mult,
+        )
+        retrieval_stats.observe("vector", time.perf_counter() - started)
+        return docs
+
+    async def aretrieve(self, query: str, query_vector=None):
+        """Documents for `query`; pass `query_vector` when the caller already embedded it"""
+
+        started = time.perf_counter()
+
+        if self.is_lexical_query(query):
+            docs = self._lexical_search(query, self.k)
+            if docs or self.vectorstore is None:
+                retrieval_stats.route("lexical")
+                retrieval_stats.observe("total", time.perf_counter() - started)
+                return docs
+
+        if query_vector is None:
+            query_vector = await self.aembed_query(query)
+
+        if self.mode == "vector":
+            docs = await self._vector_search(query_vector, self.k)
+            retrieval_stats.route("vector")
+
+        else:
+            lexical_docs = self._lexical_search(query, self.candidates)
+            vector_docs = await self._vector_search(query_vector, self.candidates)
+
+            fuse_started = time.perf_counter()
+            docs = reciprocal_rank_fusion([lexical_docs, vector_docs], self.k, self.rrf_k)
+            retrieval_stats.observe("fuse", time.perf_counter() - fuse_started)
+            retrieval_stats.route("hybrid")
+
+        retrieval_stats.observe("total", time.perf_counter() - started)
+        return docs
+
+    async def ainvoke(self, query: str):
+        return await self.aretrieve(query)
@@ -0,0 +1,126 @@
+import threading
+from collections import OrderedDict
+from app.config import Config
+from app.services.retrieval import TOKEN_RE, STOPWORDS, doc_key
+
+
+# Only these may be dropped between tokens; "c++" and "c#" must not both become "c"
+SENTENCE_PUNCTUATION = set(" \t\n\r!?.,;:'\"()[]-")
+
+
+def normalize_query(text: str, drop_stopwords: bool = False) -> str:
+    """Case-folded query with punctuation and whitespace collapsed.
+
+    Uses the BM25 token pattern, so "VPN not connecting!!" and "vpn  not
+    connecting" agree while compound tokens ("KE-2001", "etc/hosts") stay whole.
+    A query the pattern would lose anything else from (non-ASCII letters,
+    symbols such as "+" or "#") is only case-folded and whitespace-collapsed.
+    """
+
+    folded = text.casefold()
+    if not set(TOKEN_RE.sub("", folded)) <= SENTENCE_PUNCTUATION:
+        return " ".join(folded.split())
+
+    tokens = TOKEN_RE.findall(folded)
+    if drop_stopwords:
+        tokens = [token for token in tokens if token not in STOPWORDS]
+    return " ".join(tokens)
+
+
+class RetrievalCache:
+    """LRU cache of ranked chunk ids keyed on the normalized query text.
+
+    A hit skips the embedding call and the vector search. Entries hold chunk
+    ids, which are resolved back to the documents retrieval returned, so
+    grounding checks and KB references see the same documents as on a miss.
+    The query vector is kept too, for the semantic answer cache lookup.
+    """
+
+    def __init__(self, max_entries: int, drop_stopwords: bool = False):
+        self.max_entries = max_entries
+        self.drop_stopwords = drop_stopwords
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._docs = {}
+        self._kb_version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_kb_version(self, kb_version):
+        if kb_version != self._kb_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._docs.clear()
+            self._kb_version = kb_version
+
+    def lookup(self, query: str, kb_version):
+        """(docs, query vector or None) for a query seen before, else None"""
+
+        key = normalize_query(query, self.drop_stopwords)
+        if not key:
+            return None
+
+        with self._lock:
+            self._sync_kb_version(kb_version)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            ids, vector = entry
+            return [self._docs[chunk_id] for chunk_id in ids], vector
+
+    def store(self, query: str, kb_version, docs, query_vector=None):
+
+        key = normalize_query(query, self.drop_stopwords)
+        if not key:
+            return
+
+        with self._lock:
+            self._sync_kb_version(kb_version)
+
+            ids = []
+            for doc in docs:
+                chunk_id = doc_key(doc)
+                self._docs.setdefault(chunk_id, doc)
+                ids.append(chunk_id)
+
+            self._entries[key] = (tuple(ids), query_vector)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._docs.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": Config.RETRIEVAL_CACHE_ENABLED,
+            "entries": len(self._entries),
+            "chunks": len(self._docs),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "kbVersion": self._kb_version,
+        }
+
+
+retrieval_cache = RetrievalCache(
+    max_entries=Config.RETRIEVAL_CACHE_MAX_ENTRIES,
+    drop_stopwords=Config.RETRIEVAL_CACHE_DROP_STOPWORDS,
+)
@@ -0,0 +1,325 @@
+import argparse
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.config import Config
+from app.models.db import (
+    Ticket, ChatMessages, GuardRails, ChatSessions, MetricsDaily,
+    TicketStatus, Severity, Tier, MessageRole,
+)
+
+# AGGREGATES
+# Each table is read in one pass: one FILTER clause per counter instead of one
+# query per counter. The same expressions serve the live summary (no grouping)
+# and the rollup rebuild (grouped by day).
+
+def ticket_aggregates():
+    aggregates = [("tickets", func.count(Ticket.id))]
+
+    for column, values, name in (
+        (Ticket.status, TicketStatus, "status"),
+        (Ticket.severity, Severity, "severity"),
+        (Ticket.tier, Tier, "tier"),
+    ):
+        for value in values:
+            aggregates.append((f"tickets.{name}.{value.value}", func.count(Ticket.id).filter(column == value)))
+
+    return Ticket, aggregates
+
+
+def message_aggregates():
+    assistant = ChatMessages.role == MessageRole.assistant
+
+    return ChatMessages, [
+        ("messages", func.count(ChatMessages.id)),
+        ("messages.escalation", func.count(ChatMessages.id).filter(ChatMessages.need_escalation.is_(True))),
+        ("assistant.confidence_sum", func.coalesce(func.sum(ChatMessages.confidence).filter(assistant), 0)),
+        ("assistant.confidence_count", func.count(ChatMessages.confidence).filter(assistant)),
+    ]
+
+
+def guardrail_aggregates():
+    return GuardRails, [
+        ("guardrail.events", func.count(GuardRails.id)),
+        ("guardrail.blocked", func.count(GuardRails.id).filter(GuardRails.blocked.is_(True))),
+    ]
+
+
+def session_aggregates():
+    return ChatSessions, [("sessions", func.count(ChatSessions.id))]
+
+
+AGGREGATES = (ticket_aggregates, message_aggregates, guardrail_aggregates, session_aggregates)
+
+
+def live_counters(db):
+    """Every counter straight from the base tables: one scan per table"""
+
+    counters = {}
+
+    for build in AGGREGATES:
+        _, aggregates = build()
+        row = db.execute(select(*(expr for _, expr in aggregates))).one()
+        counters.update(zip((name for name, _ in aggregates), row))
+
+    counters["sessions.ticketed"] = db.execute(select(func.count(func.distinct(Ticket.session_id)))).scalar()
+
+    return counters
+
+
+def rollup_counters(db):
+    """Every counter summed over the daily rollup: O(days x metrics)"""
+
+    rows = db.execute(
+        select(MetricsDaily.metric, func.sum(MetricsDaily.value)).group_by(MetricsDaily.metric)
+    ).all()
+
+    return {metric: value for metric, value in rows}
+
+
+# INCREMENTAL MAINTENANCE
+
+def _value(value):
+    return getattr(value, "value", value)
+
+
+def _day(obj):
+    return (obj.created_at or datetime.utcnow()).date()
+
+
+def _ticket_deltas(deltas, ticket, sign):
+    day = _day(ticket)
+    deltas[(day, "tickets")] += sign
+    deltas[(day, f"tickets.status.{_value(ticket.status) or TicketStatus.OPEN.value}")] += sign
+    deltas[(day, f"tickets.severity.{_value(ticket.severity)}")] += sign
+    deltas[(day, f"tickets.tier.{_value(ticket.tier)}")] += sign
+
+
+def _message_deltas(deltas, message, sign):
+    day = _day(message)
+    deltas[(day, "messages")] += sign
+
+    if message.need_escalation:
+        deltas[(day, "messages.escalation")] += sign
+
+    if _value(message.role) == MessageRole.assistant.value and message.confidence is not None:
+        deltas[(day, "assistant.confidence_sum")] += sign * message.confidence
+        deltas[(day, "assistant.confidence_count")] += sign
+
+
+def _guardrail_deltas(deltas, event_row, sign):
+    day = _day(event_row)
+    deltas[(day, "guardrail.events")] += sign
+
+    if event_row.blocked:
+        deltas[(day, "guardrail.blocked")] += sign
+
+
+def _session_deltas(deltas, session_row, sign):
+    deltas[(_day(session_row), "sessions")] += sign
+
+
+DELTAS = {
+    Ticket: _ticket_deltas,
+    ChatMessages: _message_deltas,
+    GuardRails: _guardrail_deltas,
+    ChatSessions: _session_deltas,
+}
+
+
+def _ticket_changes(deltas, ticket):
+    """Status, tier and severity edits move a ticket between counters on its creation day"""
+
+    state = inspect(ticket)
+
+    for name in ("status", "tier", "severity"):
+        history = state.attrs[name].history
+        if history.added and history.deleted:
+            old, new = _value(history.deleted[0]), _value(history.added[0])
+            if old != new:
+                deltas[(_day(ticket), f"tickets.{name}.{old}")] -= 1
+                deltas[(_day(ticket), f"tickets.{name}.{new}")] += 1
+
+
+def _ticketed_session_deltas(deltas, conn, new_tickets, deleted_tickets):
+    """A session counts once, on the day of its first ticket.
+
+    When the last ticket of a session is deleted the count comes off that
+    ticket's day, so per-day values can drift slightly there; totals stay exact.
+    """
+
+    touched = {t.session_id for t in new_tickets} | {t.session_id for t in deleted_tickets}
+    if not touched:
+        return
+
+    remaining = dict(conn.execute(
+        select(Ticket.session_id, func.count(Ticket.id))
+        .where(Ticket.session_id.in_(touched))
+        .group_by(Ticket.session_id)
+    ).all())
+
+    added_per_session = Counter(t.session_id for t in new_tickets)
+
+    for session_id, added in added_per_session.items():
+        if remaining.get(session_id, 0) == added:
+            first = min((t for t in new_tickets if t.session_id == session_id), key=_day)
+            deltas[(_day(first), "sessions.ticketed")] += 1
+
+    emptied = set()
+    for ticket in deleted_tickets:
+        session_id = ticket.session_id
+        if session_id not in added_per_session and not remaining.get(session_id) and session_id not in emptied:
+            deltas[(_day(ticket), "sessions.ticketed")] -= 1
+            emptied.add(session_id)
+
+
+def apply_deltas(conn, deltas):
+    rows = [
+        {"day": day, "metric": metric, "value": value}
+        for (day, metric), value in sorted(deltas.items())
+        if value
+    ]
+    if not rows:
+        return
+
+    # Rows are sorted so concurrent turns lock the counters in the same order
+    stmt = insert(MetricsDaily.__table__).values(rows)
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[MetricsDaily.day, MetricsDaily.metric],
+        set_={"value": MetricsDaily.value + stmt.excluded.value},
+    ))
+
+
+def record_session_created(conn, created_at):
+    """Count a session inserted with a Core upsert, which after_flush never sees"""
+
+    if Config.METRICS_ROLLUP_ENABLED:
+        apply_deltas(conn, {(created_at.date(), "sessions"): 1})
+
+
+@event.listens_for(Session, "after_flush")
+def update_rollup(session, flush_context):
+    """Fold this flush's inserts, deletes and ticket edits into metrics_daily.
+
+    Runs inside the same transaction as the writes, so counters commit or roll
+    back with them.
+    """
+
+    if not Config.METRICS_ROLLUP_ENABLED:
+        return
+
+    deltas = Counter()
+    new_tickets, deleted_tickets = [], []
+
+    for obj in session.new:
+        handler = DELTAS.get(type(obj))
+        if handler:
+            handler(deltas, obj, 1)
+            if isinstance(obj, Ticket):
+                new_tickets.append(obj)
+
+    for obj in session.deleted:
+        handler = DELTAS.get(type(obj))
+        if handler:
+            handler(deltas, obj, -1)
+            if isinstance(obj, Ticket):
+                deleted_tickets.append(obj)
+
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj):
+            _ticket_changes(deltas, obj)
+
+    if not deltas and not new_tickets and not deleted_tickets:
+        return
+
+    conn = session.connection()
+    _ticketed_session_deltas(deltas, conn, new_tickets, deleted_tickets)
+    apply_deltas(conn, deltas)
+
+
+# REBUILD
+
+def rollup_deltas(db):
+    """Every daily counter from the base tables, with one grouped scan per table"""
+
+    deltas = Counter()
+
+    for build in AGGREGATES:
+        model, aggregates = build()
+        day = func.date(model.created_at)
+        rows = db.execute(select(day, *(expr for _, expr in aggregates)).group_by(day)).all()
+
+        for row in rows:
+            for (name, _), value in zip(aggregates, row[1:]):
+                deltas[(row[0], name)] += value
+
+    first_ticket = (
+        select(func.date(func.min(Ticket.created_at)).label("day"))
+        .group_by(Ticket.session_id)
+        .subquery()
+    )
+    for day, count in db.execute(
+        select(first_ticket.c.day, func.count()).group_by(first_ticket.c.day)
+    ).all():
+        deltas[(day, "sessions.ticketed")] += count
+
+    return deltas
+
+
+def rebuild_rollup(db):
+    """Recompute metrics_daily from the base tables"""
+
+    deltas = rollup_deltas(db)
+
+    db.execute(MetricsDaily.__table__.delete())
+    apply_deltas(db.connection(), deltas)
+    db.commit()
+
+    return len([v for v in deltas.values() if v])
+
+
+def ensure_rollup(conn):
+    """Backfill an empty metrics_daily from the base tables; True if it did.
+
+    Runs as a step of app.migrations, under its advisory lock, so workers
+    starting together cannot both backfill and double every counter. The
+    rows go in with one INSERT, which commits on its own in autocommit mode.
+    """
+
+    if conn.execute(select(MetricsDaily.day).limit(1)).first() is not None:
+        return False
+
+    apply_deltas(conn, rollup_deltas(conn))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the metrics_daily rollup")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every day from the base tables")
+    parser.add_argument("--check", action="store_true", help="Compare rollup totals with a live scan")
+    args = parser.parse_args()
+
+    from app.init_db import sessionLocal
+
+    db = sessionLocal()
+
+    try:
+        if args.rebuild:
+            print(f"Rebuilt {rebuild_rollup(db)} daily counters")
+
+        if args.check:
+            live, rolled = live_counters(db), rollup_counters(db)
+            drift = {
+                name: (live.get(name, 0), rolled.get(name, 0))
+                for name in set(live) | set(rolled)
+                if abs(float(live.get(name) or 0) - float(rolled.get(name) or 0)) > 1e-6
+            }
+            print(drift or "Rollup matches the base tables")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import asyncio
+from collections import Counter, defaultdict
+from app.config import Config
+
+
+def message_key(text: str) -> str:
+    """A user message as a coalescing key: exact apart from case and whitespace"""
+    return " ".join(text.casefold().split())
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent calls onto one in-flight call.
+
+    The first caller for a key starts the call; callers arriving while it runs
+    wait for it and share its result or exception. The call runs as its own
+    task, so a leader whose client disconnects does not cancel it for the
+    others. Beyond `max_waiters` per key, or after waiting `timeout_seconds`, a
+    caller stops waiting and makes its own call. State is per event loop, which
+    is per worker process under uvicorn.
+    """
+
+    def __init__(self, max_waiters: int, timeout_seconds: float):
+        self.max_waiters = max_waiters
+        self.timeout_seconds = timeout_seconds
+
+        self._flights = {}
+        self._counts = defaultdict(Counter)
+
+    def _finished(self, flight_key, flight):
+        def done(task):
+            if self._flights.get(flight_key) is flight:
+                del self._flights[flight_key]
+            # Marks the exception retrieved when every caller has gone
+            if not task.cancelled():
+                task.exception()
+        return done
+
+    async def run(self, name: str, key, call):
+        """Result of `call()` (a coroutine function), shared with concurrent callers of the same key"""
+
+        counts = self._counts[name]
+        flight_key = (name, key)
+        flight = self._flights.get(flight_key)
+
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[flight_key] = flight
+            flight.task.add_done_callback(self._finished(flight_key, flight))
+            counts["calls"] += 1
+            return await asyncio.shield(flight.task)
+
+        if flight.waiters >= self.max_waiters:
+            counts["overflow"] += 1
+            return await call()
+
+        flight.waiters += 1
+        counts["coalesced"] += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            counts["timeouts"] += 1
+            return await call()
+        finally:
+            flight.waiters -= 1
+
+    def stats(self):
+        return {
+            "enabled": Config.SINGLE_FLIGHT_ENABLED,
+            "maxWaiters": self.max_waiters,
+            "timeoutSeconds": self.timeout_seconds,
+            "inFlight": len(self._flights),
+            "chains": {name: dict(counts) for name, counts in self._counts.items()},
+        }
+
+
+single_flight = SingleFlight(
+    max_waiters=Config.SINGLE_FLIGHT_MAX_WAITERS,
+    timeout_seconds=Config.SINGLE_FLIGHT_TIMEOUT_SECONDS,
+)
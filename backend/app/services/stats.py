@@ -0,0 +1,78 @@
+import threading
+from collections import Counter, defaultdict, deque
+
+# Standard library only: the password pool's spawned workers import this module
+
+
+def percentile(ordered, q: float):
+    """Nearest-rank value at `q` (0..1) of an already sorted, non-empty sequence"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class RollingStats:
+    """The last `window` samples per name, plus running counters"""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self._window))
+        self._counters = Counter()
+
+    def _sorted_samples(self):
+        with self._lock:
+            return {name: sorted(samples) for name, samples in self._samples.items()}, dict(self._counters)
+
+
+class LatencyStats(RollingStats):
+    """Rolling per-stage latencies and per-route counts"""
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds * 1000)
+
+    def route(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        samples, routes = self._sorted_samples()
+        stages = {
+            stage: {
+                "count": len(ordered),
+                "p50Ms": round(percentile(ordered, 0.5), 3),
+                "p95Ms": round(percentile(ordered, 0.95), 3),
+            }
+            for stage, ordered in samples.items()
+        }
+        return {"routes": routes, "stages": stages}
+
+
+class TokenStats(RollingStats):
+    """Rolling token counts per prompt, plus running totals of what was dropped"""
+
+    def __init__(self, budget: int | None = None, window: int = 1024):
+        super().__init__(window)
+        self.budget = budget
+
+    def observe(self, name: str, tokens: int):
+        with self._lock:
+            self._samples[name].append(tokens)
+            self._counters[name] += tokens
+
+    def count(self, counts: dict):
+        with self._lock:
+            self._counters.update(counts)
+
+    def stats(self):
+        samples, totals = self._sorted_samples()
+        prompts = {
+            name: {
+                "count": len(ordered),
+                "mean": round(sum(ordered) / len(ordered), 1),
+                "p50": percentile(ordered, 0.5),
+                "p95": percentile(ordered, 0.95),
+                "max": ordered[-1],
+            }
+            for name, ordered in samples.items()
+        }
+        return {"budget": self.budget, "tokens": prompts, "totals": totals}
@@ -1,5 +1,5 @@
-from app.models.db import Ticket
-from sqlalchemy import and_
+from app.models.db import Ticket, ticket_category
+from app.services.matcher import keyword_matcher, match_message
 import uuid
 
 CATEGORY_RULES = {
@@ -11,11 +11,14 @@ CATEGORY_RULES = {
 }
 
 
+keyword_matcher.register("category", CATEGORY_RULES)
+
+
 def detect_category(message: str) -> str:
-    msg = message.lower()
+    matches = match_message(message)
 
-    for category, keywords in CATEGORY_RULES.items():
-        if any(word in msg for word in keywords):
+    for category in CATEGORY_RULES:
+        if matches.has(f"category.{category}"):
             return category
 
     return "GENERAL"
@@ -28,7 +31,7 @@ def find_existing_ticket(db,session_id: int,category: str,severity: str):
             Ticket.session_id == session_id,
             Ticket.status == "OPEN",
             Ticket.severity == severity,
-            Ticket.ai_results["category"].astext == category 
+            ticket_category == category
         )
         .first()
     )
@@ -66,15 +69,15 @@ def create_ticket_if_needed(db, session, request, response):
             "category": category,
             "kbReferences": [
                 {
-                    "id": ref.get("id"),
-                    "title": ref.get("title")
+                    "id": ref.id,
+                    "title": ref.title
                 }
                 for ref in (response.kb_references or [])
             ]
         }
     )
 
+    # Inserted with the rest of the chat turn when ChatTurn.flush commits
     db.add(ticket)
-    db.flush()
 
     return ticket
\ No newline at end of file
@@ -1,5 +1,6 @@
-from typing import Tuple
+from typing import Dict, List, Tuple
 from app.models.db import Tier, Severity, UserRole
+from app.services.matcher import MatchSet, keyword_matcher, match_message
 
 
 class TierService:
@@ -83,6 +84,26 @@ class TierService:
         "frozen",
     ]
 
+    KEYWORD_GROUPS = {
+        "tier_0": TIER_0_KEYWORDS,
+        "tier_1": TIER_1_KEYWORDS,
+        "tier_2": TIER_2_KEYWORDS,
+        "tier_3": TIER_3_KEYWORDS,
+        "critical": CRITICAL_KEYWORDS,
+        "high": HIGH_KEYWORDS,
+        "medium": MEDIUM_KEYWORDS,
+    }
+
+    def match_keywords(self, message: str) -> Dict[str, List[str]]:
+        """Keyword hits per group, used by the rules-first classifier"""
+
+        matches = match_message(message)
+
+        return {
+            group: matches.patterns(f"tier.{group}")
+            for group in self.KEYWORD_GROUPS
+        }
+
     def classify_tier_and_severity(
         self,
         message: str,
@@ -93,12 +114,12 @@ class TierService:
         need_escalation: bool = False,
     ) -> Tuple[Tier, Severity, bool]:
 
-        message_lower = message.lower()
+        matches = match_message(message)
 
-        severity = self._classify_severity(message_lower)
+        severity = self._classify_severity(matches)
 
         tier = self._classify_tier(
-            message_lower,
+            matches,
             severity,
             kb_coverage,
             repeated_failure,
@@ -115,22 +136,22 @@ class TierService:
 
         return tier, severity, needs_escalation
 
-    def _classify_severity(self, message_lower: str) -> Severity:
+    def _classify_severity(self, matches: MatchSet) -> Severity:
 
-        if any(keyword in message_lower for keyword in self.CRITICAL_KEYWORDS):
+        if matches.has("tier.critical"):
             return Severity.CRITICAL
 
-        if any(keyword in message_lower for keyword in self.HIGH_KEYWORDS):
+        if matches.has("tier.high"):
             return Severity.HIGH
 
-        if any(keyword in message_lower for keyword in self.MEDIUM_KEYWORDS):
+        if matches.has("tier.medium"):
             return Severity.MEDIUM
 
         return Severity.LOW
 
     def _classify_tier(
         self,
-        message_lower: str,
+        matches: MatchSet,
         severity: Severity,
         kb_coverage: bool,
         repeated_failure: bool,
@@ -149,16 +170,16 @@ class TierService:
         if not kb_coverage:
             return Tier.TIER_2
 
-        if any(k in message_lower for k in self.TIER_3_KEYWORDS):
+        if matches.has("tier.tier_3"):
             return Tier.TIER_3
 
-        if any(k in message_lower for k in self.TIER_2_KEYWORDS):
+        if matches.has("tier.tier_2"):
             return Tier.TIER_2
 
-        if any(k in message_lower for k in self.TIER_1_KEYWORDS):
+        if matches.has("tier.tier_1"):
             return Tier.TIER_1
 
-        if any(k in message_lower for k in self.TIER_0_KEYWORDS):
+        if matches.has("tier.tier_0"):
             return Tier.TIER_0
 
         return Tier.TIER_1
@@ -187,4 +208,7 @@ class TierService:
         if not kb_coverage and severity in [Severity.HIGH, Severity.MEDIUM]:
             return True
 
-        return False
\ No newline at end of file
+        return False
+
+
+keyword_matcher.register("tier", TierService.KEYWORD_GROUPS)
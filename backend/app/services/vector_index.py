@@ -0,0 +1,140 @@
+import uuid
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+
+class InMemoryVectorIndex(VectorStore):
+    """Array-backed cosine / MMR index held entirely in process.
+
+    Rows are L2-normalised on insert so cosine similarity is a single
+    matrix-vector product against the whole corpus.
+    """
+
+    def __init__(self, embedding):
+        self._embedding = embedding
+        self._ids = []
+        self._docs = []
+        self._matrix = None
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+
+        rows = self._normalize(self._embedding.embed_documents(texts))
+        self._matrix = rows if self._matrix is None else np.vstack([self._matrix, rows])
+
+        for doc_id, text, metadata in zip(ids, texts, metadatas):
+            self._ids.append(doc_id)
+            self._docs.append(Document(id=doc_id, page_content=text, metadata=dict(metadata)))
+
+        return ids
+
+    def delete(self, ids=None, **kwargs):
+        if not ids or self._matrix is None:
+            return None
+
+        drop = set(ids)
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in drop]
+
+        self._matrix = self._matrix[keep] if keep else None
+        self._ids = [self._ids[i] for i in keep]
+        self._docs = [self._docs[i] for i in keep]
+
+        return True
+
+    def get_by_ids(self, ids):
+        wanted = set(ids)
+        return [doc for doc in self._docs if doc.id in wanted]
+
+    def _scores(self, query_vector):
+        return self._matrix @ self._normalize(query_vector)[0]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+        if self._matrix is None:
+            return []
+
+        scores = self._scores(embedding)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self._docs[i], float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, **kwargs)
+
+    def _similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+        # Cosine in [-1, 1] mapped to [0, 1]
+        return [(doc, (score + 1) / 2) for doc, score in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k=4, fetch_k=20, lambda_mult=0.5, **kwargs):
+        if self._matrix is None:
+            return []
+
+        scores = self._scores(embedding)
+        fetch_k = min(max(fetch_k, k), len(scores))
+        candidates = np.argpartition(-scores, fetch_k - 1)[:fetch_k]
+
+        relevance = scores[candidates]
+        redundancy = self._matrix[candidates] @ self._matrix[candidates].T
+
+        selected = [int(np.argmax(relevance))]
+        max_overlap = redundancy[selected[0]].copy()
+
+        while len(selected) < min(k, fetch_k):
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * max_overlap
+            mmr[selected] = -np.inf
+            pick = int(np.argmax(mmr))
+            selected.append(pick)
+            max_overlap = np.maximum(max_overlap, redundancy[pick])
+
+        return [self._docs[candidates[i]] for i in selected]
+
+    def max_marginal_relevance_search(self, query, k=4, fetch_k=20, lambda_mult=0.5, **kwargs):
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding.embed_query(query), k, fetch_k, lambda_mult, **kwargs
+        )
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        index = cls(embedding)
+        index.add_texts(texts, metadatas=metadatas, ids=ids)
+        return index
+
+    @classmethod
+    def from_documents(cls, documents, embedding, **kwargs):
+        documents = list(documents)
+        ids = [doc.metadata.get("content_hash") or doc.id or str(uuid.uuid4()) for doc in documents]
+        return cls.from_texts(
+            [doc.page_content for doc in documents],
+            embedding,
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+        )
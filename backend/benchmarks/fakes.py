@@ -0,0 +1,130 @@
+"""Deterministic stand-ins for ChatOpenAI and OpenAIEmbeddings with configurable latency.
+
+Outputs depend only on the prompt, so two runs over the same request mix do the
+same work. Latency is `latency_seconds` scaled by +/- `jitter`, also derived
+from the prompt, so it is reproducible too.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Iterator, AsyncIterator
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from app.services.embeddings import HashingEmbeddings
+
+# Escalation wording the classifier prompt is told to look for
+ESCALATION_WORDS = ("still", "again", "multiple", "everyone", "urgent", "outage", "cannot")
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _delay(text: str, latency_seconds: float, jitter: float) -> float:
+    spread = (_digest(text) % 1000) / 1000 * 2 - 1
+    return max(0.0, latency_seconds * (1 + jitter * spread))
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers every prompt with a ChatResponse-shaped JSON object.
+
+    Both the RAG and the classification chains parse that shape. Streaming
+    yields the same text in `stream_chunks` pieces spread over the latency.
+    """
+
+    latency_seconds: float = 0.8
+    jitter: float = 0.25
+    stream_chunks: int = 24
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _prompt(self, messages) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _reply(self, prompt: str) -> str:
+        # The user's text: "Question:" in the RAG prompt, "Support Request:" in the classifier's
+        question = prompt
+        for marker in ("Question:", "Support Request:"):
+            if marker in question:
+                question = question.rsplit(marker, 1)[-1]
+        lowered = question.split("Generated Answer:", 1)[0].lower()
+        escalate = any(word in lowered for word in ESCALATION_WORDS)
+
+        digest = _digest(prompt)
+        return json.dumps({
+            "answer": f"Follow the documented recovery steps for this issue (ref {digest % 10_000:04d}). "
+                      "Restart the lab environment from the dashboard, wait for the health check, and "
+                      "retry. If the problem persists, collect the error code and open a ticket.",
+            "confidence": round(0.6 + (digest % 35) / 100, 2),
+            "needEscalation": escalate,
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        prompt = self._prompt(messages)
+        time.sleep(_delay(prompt, self.latency_seconds, self.jitter))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(prompt)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        prompt = self._prompt(messages)
+        await asyncio.sleep(_delay(prompt, self.latency_seconds, self.jitter))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(prompt)))])
+
+    def _pieces(self, prompt: str):
+        text = self._reply(prompt)
+        size = max(1, len(text) // self.stream_chunks)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        prompt = self._prompt(messages)
+        pieces = self._pieces(prompt)
+        pause = _delay(prompt, self.latency_seconds, self.jitter) / len(pieces)
+        for piece in pieces:
+            time.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        prompt = self._prompt(messages)
+        pieces = self._pieces(prompt)
+        pause = _delay(prompt, self.latency_seconds, self.jitter) / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(pause)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+class FakeEmbeddings(HashingEmbeddings):
+    """The offline hashing embedder plus a per-call delay, like a remote embeddings API"""
+
+    def __init__(self, dim: int = 512, latency_seconds: float = 0.05, jitter: float = 0.25):
+        super().__init__(dim=dim)
+        self.latency_seconds = latency_seconds
+        self.jitter = jitter
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(_delay(str(len(texts)), self.latency_seconds, self.jitter))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        time.sleep(_delay(text, self.latency_seconds, self.jitter))
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        await asyncio.sleep(_delay(str(len(texts)), self.latency_seconds, self.jitter))
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        await asyncio.sleep(_delay(text, self.latency_seconds, self.jitter))
+        return super().embed_query(text)
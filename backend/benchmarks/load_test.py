@@ -0,0 +1,354 @@
+"""End-to-end load test of the API with a fake LLM and fake embeddings.
+
+Starts the FastAPI app in process (lifespan included) against the database in
+CONNECTION_PG_DB. ChatOpenAI and the embeddings backend are replaced with the
+deterministic stubs from benchmarks/fakes.py, and the vector index is the
+in-memory one, so no OpenAI calls are made. Virtual clients, each a user of
+one role with its own chat session, send a weighted mix of chat, ticket and
+metrics requests. Concurrency is fixed.
+
+Reports per endpoint: requests, errors, p50/p95/p99 latency, requests per
+second and SQL statements per request, plus process RSS growth over the run.
+`--save-baseline` writes the report as JSON. `--baseline` compares a run
+against a saved report and exits 1 on a regression beyond `--tolerance`.
+
+    cd backend
+    python -m benchmarks.load_test --concurrency 32 --duration 60 --save-baseline benchmarks/baselines/load_test.json
+    python -m benchmarks.load_test --concurrency 32 --duration 60 --baseline benchmarks/baselines/load_test.json
+
+Use a disposable database: rows written by the run (users, sessions, messages,
+tickets) are left in place.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import resource
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+# Before the app reads its configuration
+os.environ.setdefault("VECTOR_BACKEND", "memory")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+
+import httpx
+from sqlalchemy import event, select
+from app.init_db import engine, async_engine, sessionLocal
+from app.main import app
+from app.models.db import User
+from app.administration.security import create_access_token, hash_password
+from app.services.container import services
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings
+
+ROLES = ["trainee", "instructor", "operator", "support engineer", "admin"]
+
+# Roughly what a class session looks like: mostly how-to questions, some error
+# codes (lexical route), repeated failures, and the odd request guardrails block
+MESSAGES = [
+    (6, "How do I restart my lab VM after it froze?"),
+    (4, "My container fails to start with error KE-2001"),
+    (3, "DNS resolution fails inside the lab environment"),
+    (3, "Where do I find the logs for my virtual lab?"),
+    (2, "I tried restarting three times and it is still failing"),
+    (2, "Multiple trainees in my class cannot log in"),
+    (2, "What is the SLA for a tier 2 ticket?"),
+    (1, "Give me root access to the host machine"),
+    (1, "How do I delete all VMs in the cluster?"),
+    (1, "Startup script startup.sh exits with KE-3001"),
+]
+
+# Default share of each endpoint in the mix
+MIX = {
+    "chat": 60,
+    "tickets": 20,
+    "metrics_summary": 8,
+    "metrics_trends": 8,
+    "metrics_runtime": 4,
+}
+
+# SQL statements issued on behalf of the request being timed
+current_request = contextvars.ContextVar("current_request", default=None)
+
+
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = current_request.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:  # not Linux: peak RSS is the best available
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in MIX:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}; choose from {sorted(MIX)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def seed_users(per_role):
+    """One user per role and slot; reused across runs"""
+
+    password_hash = hash_password("load-test")
+    users = []
+
+    with sessionLocal() as db:
+        for role in ROLES:
+            for n in range(per_role):
+                username = f"load-{role.replace(' ', '-')}-{n}"
+                user_id = db.scalar(select(User.id).where(User.username == username))
+                if not user_id:
+                    user_id = str(uuid.uuid4())
+                    db.add(User(id=user_id, username=username, password_hash=password_hash, role=role))
+                users.append((username, user_id, role))
+        db.commit()
+
+    return users
+
+
+class Client:
+    """A signed-in user with one chat session"""
+
+    def __init__(self, http, username, user_id, role, rng):
+        self.http = http
+        self.role = role
+        self.rng = rng
+        token = create_access_token({
+            "sub": username,
+            "user_id": user_id,
+            "role": role,
+            "session_id": str(uuid.uuid4()),
+        })
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.messages = [message for weight, message in MESSAGES for _ in range(weight)]
+
+    async def chat(self):
+        return await self.http.post("/api/chat", headers=self.headers, json={
+            "message": self.rng.choice(self.messages),
+            "context": {"module": "lab", "channel": "web"},
+        })
+
+    async def tickets(self):
+        return await self.http.get("/api/tickets", headers=self.headers, params={"limit": 50})
+
+    async def metrics_summary(self):
+        return await self.http.get("/api/metrics/summary", headers=self.headers)
+
+    async def metrics_trends(self):
+        return await self.http.get("/api/metrics/trends", headers=self.headers, params={"days": 7})
+
+    async def metrics_runtime(self):
+        return await self.http.get("/api/metrics/runtime", headers=self.headers)
+
+
+async def drive(clients, mix, deadline, max_requests, results):
+    names, weights = list(mix), list(mix.values())
+    issued = 0
+
+    async def worker(client):
+        nonlocal issued
+        while time.monotonic() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            name = client.rng.choices(names, weights)[0]
+
+            counter = [0]
+            token = current_request.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await getattr(client, name)()
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            finally:
+                elapsed = time.perf_counter() - start
+                current_request.reset(token)
+
+            results[name].append((elapsed, counter[0], ok))
+
+    await asyncio.gather(*(worker(client) for client in clients))
+
+
+def summarize(results, wall, rss):
+    endpoints = {}
+
+    for name, samples in sorted(results.items()):
+        latencies = [elapsed for elapsed, _, _ in samples]
+        queries = [count for _, count, _ in samples]
+        endpoints[name] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, _, ok in samples if not ok),
+            "rps": round(len(samples) / wall, 2),
+            "p50Ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95Ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99Ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "queriesPerRequest": round(sum(queries) / len(queries), 2) if queries else 0,
+            "maxQueries": max(queries, default=0),
+        }
+
+    every = [sample for samples in results.values() for sample in samples]
+    latencies = [elapsed for elapsed, _, _ in every]
+
+    return {
+        "total": {
+            "requests": len(every),
+            "errors": sum(1 for _, _, ok in every if not ok),
+            "rps": round(len(every) / wall, 2),
+            "p50Ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95Ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99Ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "wallSeconds": round(wall, 2),
+        },
+        "endpoints": endpoints,
+        "memory": {
+            "rssStartMb": round(rss[0], 1),
+            "rssEndMb": round(rss[1], 1),
+            "rssGrowthMb": round(rss[1] - rss[0], 1),
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Regressions against a saved report: slower p95, lower throughput, more queries, more memory"""
+
+    regressions = []
+
+    def check(label, current, previous, higher_is_worse=True, slack=0.0):
+        if previous is None or current is None:
+            return
+        limit = previous * (1 + tolerance) + slack if higher_is_worse else previous * (1 - tolerance)
+        if (current > limit) if higher_is_worse else (current < limit):
+            regressions.append(f"{label}: {previous} -> {current}")
+
+    for name, current in report["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if not previous:
+            continue
+        check(f"{name} p95Ms", current["p95Ms"], previous["p95Ms"])
+        check(f"{name} rps", current["rps"], previous["rps"], higher_is_worse=False)
+        # Query counts barely vary for a given mix, so they get an absolute allowance
+        if current["queriesPerRequest"] > previous["queriesPerRequest"] + 0.5:
+            regressions.append(
+                f"{name} queriesPerRequest: {previous['queriesPerRequest']} -> {current['queriesPerRequest']}"
+            )
+
+    check("rssGrowthMb", report["memory"]["rssGrowthMb"], baseline["memory"]["rssGrowthMb"], slack=16)
+
+    return regressions
+
+
+async def run(args):
+    llm = FakeChatModel(latency_seconds=args.llm_latency_ms / 1000, jitter=args.jitter)
+    embeddings = FakeEmbeddings(latency_seconds=args.embedding_latency_ms / 1000, jitter=args.jitter)
+    services.override("llm", llm)
+    services.override("embeddings", embeddings)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", count_statement)
+
+    async with app.router.lifespan_context(app):
+        while not services.ready:
+            if services.warm_up_error:
+                raise RuntimeError(f"Warm-up failed: {services.warm_up_error}")
+            await asyncio.sleep(0.1)
+
+        users = seed_users(max(1, -(-args.concurrency // len(ROLES))))
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as http:
+            rng = random.Random(args.seed)
+            clients = [
+                Client(http, *users[i % len(users)], rng=random.Random(rng.random()))
+                for i in range(args.concurrency)
+            ]
+
+            # Warm caches and connection pools outside the measured window
+            await drive(clients, args.mix, time.monotonic() + args.warmup, 0, defaultdict(list))
+
+            rss_start = rss_mb()
+            results = defaultdict(list)
+            started = time.perf_counter()
+            await drive(clients, args.mix, time.monotonic() + args.duration, args.requests, results)
+            wall = time.perf_counter() - started
+            rss_end = rss_mb()
+
+    report = summarize(results, wall, (rss_start, rss_end))
+    report["config"] = {
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "requests": args.requests,
+        "mix": args.mix,
+        "llmLatencyMs": args.llm_latency_ms,
+        "embeddingLatencyMs": args.embedding_latency_ms,
+        "seed": args.seed,
+        "llmCalls": llm.calls,
+        "embeddingCalls": embeddings.calls,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual clients sending requests back to back")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: run for --duration)")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", type=parse_mix, default=MIX, help="e.g. chat=60,tickets=20,metrics_summary=20")
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50)
+    parser.add_argument("--jitter", type=float, default=0.25, help="Latency spread, as a fraction of the mean")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare with a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    total = report["total"]
+    print(f"{total['requests']} requests in {total['wallSeconds']}s at concurrency {args.concurrency}: "
+          f"{total['rps']} req/s, p50 {total['p50Ms']} ms, p95 {total['p95Ms']} ms, p99 {total['p99Ms']} ms, "
+          f"{total['errors']} errors")
+    print(f"{'endpoint':<18} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    for name, stats in report["endpoints"].items():
+        print(f"{name:<18} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8} {stats['p50Ms']:>9} "
+              f"{stats['p95Ms']:>9} {stats['p99Ms']:>9} {stats['queriesPerRequest']:>8}")
+    memory = report["memory"]
+    print(f"RSS {memory['rssStartMb']} MB -> {memory['rssEndMb']} MB ({memory['rssGrowthMb']:+} MB)")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
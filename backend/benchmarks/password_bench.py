@@ -0,0 +1,106 @@
+"""Argon2 logins per second, inline and on the password pool, for given cost parameters.
+
+Each "login" is one verify against a stored hash, which is what POST
+/api/auth/login spends its CPU on. Concurrent clients are simulated with a
+thread pool, the same way FastAPI runs the sync auth routes. Reports total
+throughput, throughput per worker process (per core when workers <= cores),
+p50/p95 latency, and how many calls were turned away with a 429.
+
+    cd backend
+    python -m benchmarks.password_bench --logins 200 --clients 32 --workers 1 2 4
+    python -m benchmarks.password_bench --time-cost 2 --memory-kib 19456 --parallelism 1
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.config import Config
+from app.administration.password_pool import PasswordPool
+
+# Applied before app.administration.security is imported here and in the workers
+PARAMS = {
+    "time_cost": "ARGON2_TIME_COST",
+    "memory_kib": "ARGON2_MEMORY_COST_KIB",
+    "parallelism": "ARGON2_PARALLELISM",
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0
+
+
+def run(pool, verify, stored, logins, clients):
+    latencies = []
+    rejected = 0
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            pool.run("verify", verify, "correct horse battery staple", stored)
+        except HTTPException:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as threads:
+        for elapsed in threads.map(login, range(logins)):
+            if elapsed is None:
+                rejected += 1
+            else:
+                latencies.append(elapsed)
+    wall = time.perf_counter() - start
+
+    return len(latencies) / wall, latencies, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent login requests")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2],
+                        help="Pool sizes to compare; 0 runs inline on the client threads")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help="Defaults to --clients so nothing is rejected")
+    parser.add_argument("--time-cost", type=int, default=Config.ARGON2_TIME_COST)
+    parser.add_argument("--memory-kib", type=int, default=Config.ARGON2_MEMORY_COST_KIB)
+    parser.add_argument("--parallelism", type=int, default=Config.ARGON2_PARALLELISM)
+    args = parser.parse_args()
+
+    for arg, name in PARAMS.items():
+        os.environ[name] = str(getattr(args, arg))
+        setattr(Config, name, getattr(args, arg))
+
+    from app.administration import security
+
+    context = CryptContext(
+        schemes=["argon2"],
+        argon2__rounds=args.time_cost,
+        argon2__memory_cost=args.memory_kib,
+        argon2__parallelism=args.parallelism,
+    )
+    stored = context.hash("correct horse battery staple")
+
+    print(f"argon2id t={args.time_cost} m={args.memory_kib} KiB p={args.parallelism}, "
+          f"{args.logins} logins from {args.clients} clients, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'logins/s':>10} {'per worker':>11} {'p50 ms':>9} {'p95 ms':>9} {'rejected':>9}")
+
+    for workers in args.workers:
+        pool = PasswordPool(workers, args.max_pending or args.clients, timeout_seconds=600)
+        pool.warm_up()
+        try:
+            throughput, latencies, rejected = run(
+                pool, security._verify_and_update, stored, args.logins, args.clients,
+            )
+        finally:
+            pool.shutdown()
+
+        per_worker = throughput / (workers or min(args.clients, os.cpu_count() or 1))
+        print(f"{workers or 'inline':>8} {throughput:>10.1f} {per_worker:>11.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f} {rejected:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Commits, statements and wall time to persist one grounded chat turn.
+
+Compares the old commit-per-row helpers with the ChatTurn unit of work.
+Needs a disposable PostgreSQL database in CONNECTION_PG_DB.
+
+    cd backend
+    python -m benchmarks.persistence_bench --turns 200
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import event
+from app.init_db import engine, sessionLocal, Base
+from app.models.db import User, ChatSessions, ChatMessages, GuardRails, KBReferences, Ticket
+from app.services.memory import ChatTurn
+
+DOCS = [
+    SimpleNamespace(metadata={"source": f"kb/{n:02d}.md", "title": f"Doc {n}"})
+    for n in range(3)
+]
+
+
+def legacy_turn(db, session_db_id):
+    """What ask_question used to do: add + commit + refresh for every row"""
+
+    def save(row):
+        db.add(row)
+        db.commit()
+        db.refresh(row)
+        return row
+
+    user_msg = save(ChatMessages(session_id=session_db_id, role="user", content="vm kernel panic", created_at=datetime.utcnow()))
+    save(GuardRails(session_id=session_db_id, message_id=user_msg.id, blocked=False))
+
+    for doc in DOCS:
+        save(KBReferences(session_id=session_db_id, kb_id=doc.metadata["source"], title=doc.metadata["title"]))
+
+    db.add(Ticket(id=str(uuid.uuid4()), session_id=session_db_id, tier="TIER_2", severity="HIGH", status="OPEN", user_role="trainee", ai_results={}))
+    db.flush()
+
+    save(ChatMessages(session_id=session_db_id, role="assistant", content="answer", tier="TIER_2", severity="HIGH", created_at=datetime.utcnow()))
+    db.commit()
+
+
+def unit_of_work_turn(db, session_db_id):
+
+    turn = ChatTurn(session_db_id)
+
+    user_msg = turn.add_message(role="user", content="vm kernel panic")
+    turn.add_guardrail_event(message_id=user_msg.id, blocked=False)
+    turn.add_kb_references(DOCS)
+
+    db.add(Ticket(id=str(uuid.uuid4()), session_id=session_db_id, tier="TIER_2", severity="HIGH", status="OPEN", user_role="trainee", ai_results={}))
+
+    turn.add_message(role="assistant", content="answer", tier="TIER_2", severity="HIGH")
+    turn.flush(db)
+
+
+def run(label, write_turn, session_db_id, turns):
+
+    counts = {"commits": 0, "statements": 0}
+
+    def on_commit(conn):
+        counts["commits"] += 1
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+
+    event.listen(engine, "commit", on_commit)
+    event.listen(engine, "before_cursor_execute", on_execute)
+
+    db = sessionLocal()
+    started = time.perf_counter()
+    try:
+        for _ in range(turns):
+            write_turn(db, session_db_id)
+    finally:
+        elapsed = time.perf_counter() - started
+        db.close()
+        event.remove(engine, "commit", on_commit)
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    print(
+        f"{label:<16} commits/turn={counts['commits'] / turns:5.1f}  "
+        f"statements/turn={counts['statements'] / turns:5.1f}  "
+        f"ms/turn={elapsed * 1000 / turns:7.2f}"
+    )
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionLocal()
+    user = User(id=str(uuid.uuid4()), username=f"bench-{uuid.uuid4().hex[:8]}", password_hash="x", role="trainee")
+    session = ChatSessions(session_id=str(uuid.uuid4()), user_id=user.id, user_role="trainee", context={})
+    db.add_all([user, session])
+    db.commit()
+    session_db_id = session.id
+    db.close()
+
+    run("commit-per-row", legacy_turn, session_db_id, args.turns)
+    run("unit-of-work", unit_of_work_turn, session_db_id, args.turns)
+
+
+if __name__ == "__main__":
+    main()
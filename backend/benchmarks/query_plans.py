@@ -0,0 +1,198 @@
+"""EXPLAIN the hot ORM queries against seeded large tables and flag sequential scans.
+
+Runs the real helpers (find_existing_ticket, load_chat_history,
+get_or_create_session, the trends query), captures the SQL they emit and
+EXPLAINs it with the same parameters. Exits non-zero when any plan falls back
+to a Seq Scan on a seeded table, e.g. after an index from app/migrations.py is
+dropped or a query stops matching it. Needs a disposable PostgreSQL database in
+CONNECTION_PG_DB; rows are inserted with plain SQL, so the metrics rollup is
+not updated.
+
+    cd backend
+    python -m benchmarks.query_plans --sessions 20000 --messages 10
+"""
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import event, text
+from app.init_db import engine, sessionLocal, Base
+from app.migrations import run_migrations
+from app.services.tickets import find_existing_ticket
+from app.services.memory import get_or_create_session, load_chat_history
+from app.services.metrics import trend_rows
+
+SEEDED_TABLES = {"chat_sessions", "chat_messages", "tickets", "guardrail_events"}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, username, password_hash, role, created_at)
+    VALUES ('bench-user', 'bench-user', 'x', 'Trainee', now())
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO chat_sessions (session_id, user_id, user_role, context, created_at)
+    SELECT 'bench-' || g, 'bench-user', 'Trainee'::session_role_enum, '{}'::jsonb,
+           (now() AT TIME ZONE 'utc') - (g % 365) * interval '1 day'
+    FROM generate_series(1, :sessions) AS g
+    """,
+    """
+    INSERT INTO chat_messages (id, session_id, role, content, need_escalation, confidence, created_at)
+    SELECT gen_random_uuid(), s.id,
+           (CASE WHEN g % 2 = 1 THEN 'user' ELSE 'assistant' END)::message_role_enum,
+           'seeded message', g % 10 = 0, 0.8, s.created_at + g * interval '1 second'
+    FROM chat_sessions s, generate_series(1, :messages) AS g
+    WHERE s.session_id LIKE 'bench-%'
+    """,
+    """
+    INSERT INTO tickets (id, session_id, tier, severity, status, user_role, ai_results, created_at, updated_at)
+    SELECT 'bench-' || s.id, s.id, 'TIER_2'::ticket_tier_enum,
+           (ARRAY['MEDIUM', 'HIGH', 'CRITICAL'])[1 + s.id % 3]::ticket_severity_enum,
+           (ARRAY['OPEN', 'RESOLVED'])[1 + s.id % 2]::ticket_status_enum,
+           'Trainee'::ticket_role_enum,
+           jsonb_build_object('category', (ARRAY['VM', 'AUTH', 'NETWORK', 'CONTAINER'])[1 + s.id % 4]),
+           s.created_at, s.created_at
+    FROM chat_sessions s
+    WHERE s.session_id LIKE 'bench-%' AND s.id % 2 = 0
+    """,
+    """
+    INSERT INTO guardrail_events (session_id, message_id, blocked, created_at)
+    SELECT m.session_id, m.id, random() < 0.05, m.created_at
+    FROM chat_messages m
+    WHERE m.content = 'seeded message' AND m.role = 'user'
+    """,
+]
+
+CLEANUP_SQL = [
+    "DELETE FROM guardrail_events WHERE session_id IN (SELECT id FROM chat_sessions WHERE session_id LIKE 'bench-%')",
+    "DELETE FROM chat_messages WHERE session_id IN (SELECT id FROM chat_sessions WHERE session_id LIKE 'bench-%')",
+    "DELETE FROM tickets WHERE session_id IN (SELECT id FROM chat_sessions WHERE session_id LIKE 'bench-%')",
+    "DELETE FROM kb_references WHERE session_id IN (SELECT id FROM chat_sessions WHERE session_id LIKE 'bench-%')",
+    "DELETE FROM chat_sessions WHERE session_id LIKE 'bench-%'",
+]
+
+
+def seed(sessions, messages, reseed):
+    with engine.begin() as conn:
+        existing = conn.execute(text("SELECT count(*) FROM chat_sessions WHERE session_id LIKE 'bench-%'")).scalar()
+
+        if existing and not reseed:
+            print(f"Using {existing} seeded sessions (pass --reseed to rebuild)")
+        else:
+            for statement in CLEANUP_SQL:
+                conn.execute(text(statement))
+            for statement in SEED_SQL:
+                conn.execute(text(statement), {"sessions": sessions, "messages": messages})
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in sorted(SEEDED_TABLES):
+            conn.execute(text(f"ANALYZE {table}"))
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def hot_queries(db):
+    """(name, callable) for every query on the chat and dashboard hot paths"""
+
+    session_row = db.execute(text(
+        "SELECT id, session_id FROM chat_sessions WHERE session_id LIKE 'bench-%' ORDER BY id DESC LIMIT 1"
+    )).one()
+
+    return [
+        ("find_existing_ticket", lambda: find_existing_ticket(db, session_row.id, "VM", "HIGH")),
+        ("load_chat_history", lambda: load_chat_history(db, session_row.id, limit=10)),
+        ("get_or_create_session", lambda: get_or_create_session(
+            db, session_row.session_id, "bench-user", "trainee", {},
+        )),
+        ("metrics_trends (7 days)", lambda: trend_rows(db, (datetime.utcnow() - timedelta(days=7)).date())),
+    ]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(statement, parameters, analyze):
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+
+    with engine.connect() as conn:
+        raw = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).scalar()
+
+    return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+
+def plan_checks(db, analyze=False):
+    """(name, plan, scans, seq scans on seeded tables) for each statement the hot helpers emit"""
+
+    checks = []
+
+    for name, run in hot_queries(db):
+        with captured_statements() as statements:
+            run()
+
+        for statement, parameters in statements:
+            result = explain(statement, parameters, analyze)
+            nodes = list(plan_nodes(result["Plan"]))
+
+            scans = sorted({
+                f"{node['Node Type']} on {node['Relation Name']}" + (f" ({node['Index Name']})" if node.get("Index Name") else "")
+                for node in nodes if "Relation Name" in node
+            })
+            seq_scans = [
+                node["Relation Name"] for node in nodes
+                if node["Node Type"] == "Seq Scan" and node["Relation Name"] in SEEDED_TABLES
+            ]
+
+            checks.append((name, result, scans, seq_scans))
+
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--messages", type=int, default=10, help="Messages per seeded session")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE and report execution time")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed(args.sessions, args.messages, args.reseed)
+
+    regressions = []
+
+    with sessionLocal() as db:
+        for name, result, scans, seq_scans in plan_checks(db, args.analyze):
+            timing = f"  {result['Execution Time']:.2f} ms" if args.analyze else ""
+            status = "SEQ SCAN" if seq_scans else "ok"
+            print(f"{status:<9} {name}  cost={result['Plan']['Total Cost']:.0f}{timing}")
+            for scan in scans:
+                print(f"          {scan}")
+
+            if seq_scans:
+                regressions.append((name, seq_scans))
+
+    if regressions:
+        print(f"\n{len(regressions)} plan(s) fell back to a sequential scan: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
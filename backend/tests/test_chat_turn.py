@@ -0,0 +1,217 @@
+import asyncio
+from contextlib import aclosing
+import pytest
+from app.config import Config
+from app.models.schemas import ChatRequest
+from app.services import rag
+from app.services.container import ServiceContainer
+from app.services.corpus import kb_corpus
+from app.services.embeddings import HashingEmbeddings
+from app.services.memory import ChatTurn, SessionRef
+from app.services.retrieval import BM25Index, HybridRetriever
+from app.services.retrieval_cache import retrieval_cache
+from app.services.answer_cache import answer_cache
+from app.services.vector_index import InMemoryVectorIndex
+from benchmarks.fakes import FakeChatModel
+
+MESSAGES = [
+    "My lab VM freezes during boot, how do I restart it?",
+    "The DNS lookup for the range domain does not resolve",
+    "I keep getting redirected back to the login page after MFA",
+]
+
+
+class CountingRetriever(HybridRetriever):
+    calls = 0
+
+    async def aretrieve(self, query, query_vector=None):
+        self.calls += 1
+        return await super().aretrieve(query, query_vector=query_vector)
+
+
+class FakeAsyncSession:
+    """Runs the sync persistence helpers directly; the helpers themselves are patched out"""
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(None, *args, **kwargs)
+
+    async def rollback(self):
+        pass
+
+
+@pytest.fixture
+def flushed(monkeypatch):
+    turns = []
+
+    def flush(turn, db):
+        turn.flushed = True
+        turns.append(turn)
+
+    monkeypatch.setattr(ChatTurn, "flush", flush)
+    return turns
+
+
+@pytest.fixture
+def retriever(monkeypatch, flushed):
+    docs = kb_corpus.documents()
+    embeddings = HashingEmbeddings()
+    retriever = CountingRetriever(
+        lexical=BM25Index(docs),
+        vectorstore=InMemoryVectorIndex.from_documents(docs, embeddings),
+        mode="hybrid",
+    )
+
+    llm = FakeChatModel(latency_seconds=0, jitter=0)
+    container = ServiceContainer()
+    container.override("retriever", retriever)
+    container.override("rag_chain", rag.build_rag_chain(llm))
+    container.override("rag_stream_chain", rag.build_rag_stream_chain(llm))
+    container.override("classify_chain", rag.build_classify_chain(llm))
+    monkeypatch.setattr(container, "kb_version", lambda: "test")
+    monkeypatch.setattr(rag, "services", container)
+
+    # Every request must reach the retriever: no cache may answer it
+    monkeypatch.setattr(Config, "ANSWER_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "RETRIEVAL_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "CLASSIFIER_FAST_PATH", "off")
+
+    monkeypatch.setattr(rag, "load_chat_history", lambda db, session_id, limit=10: "")
+    monkeypatch.setattr(rag, "create_ticket_if_needed", lambda db, *args, **kwargs: None)
+
+    return retriever
+
+
+def request(message):
+    return ChatRequest(session_id="s-1", message=message, user_role="trainee", context={})
+
+
+def test_one_retrieval_per_request(retriever):
+    session = SessionRef(1, "s-1", "u-1")
+
+    async def run():
+        for message in MESSAGES:
+            before = retriever.calls
+            response = await rag.ask_question(request(message), FakeAsyncSession(), session)
+            assert response.answer
+            assert retriever.calls - before == 1
+
+    asyncio.run(run())
+
+
+def test_one_retrieval_per_streamed_request(retriever):
+    session = SessionRef(1, "s-1", "u-1")
+
+    async def run():
+        for message in MESSAGES:
+            before = retriever.calls
+            events = [event async for event in rag.chat_turn(request(message), FakeAsyncSession(), session, stream=True)]
+            assert events[-1][0] == "final"
+            assert any(event == "token" for event, _ in events)
+            assert retriever.calls - before == 1
+
+    asyncio.run(run())
+
+
+def test_closed_stream_saves_partial_turn(retriever, flushed):
+    session = SessionRef(1, "s-1", "u-1")
+
+    async def run():
+        async with aclosing(rag.chat_turn(request(MESSAGES[0]), FakeAsyncSession(), session, stream=True)) as events:
+            async for event, _ in events:
+                if event == "token":
+                    break
+
+    asyncio.run(run())
+
+    assert len(flushed) == 1
+    assert [message.content for message in flushed[0].messages] == [MESSAGES[0]]
+
+
+def test_cancelled_stream_saves_partial_turn(retriever, flushed):
+    session = SessionRef(1, "s-1", "u-1")
+    rag.services.override("rag_stream_chain", rag.build_rag_stream_chain(FakeChatModel(latency_seconds=5)))
+
+    async def consume():
+        async for _ in rag.chat_turn(request(MESSAGES[0]), FakeAsyncSession(), session, stream=True):
+            pass
+
+    async def run():
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert len(flushed) == 1
+    assert [message.content for message in flushed[0].messages] == [MESSAGES[0]]
+
+
+@pytest.mark.parametrize("messages, llm_calls", [
+    (["VPN not connecting", "vpn  NOT connecting"], 1),
+    (["C++ build fails in the lab", "C# build fails in the lab"], 2),
+])
+def test_concurrent_questions_share_only_identical_rag_calls(retriever, monkeypatch, messages, llm_calls):
+    session = SessionRef(1, "s-1", "u-1")
+    llm = FakeChatModel(latency_seconds=0.2, jitter=0)
+    rag.services.override("rag_chain", rag.build_rag_chain(llm))
+    monkeypatch.setattr(Config, "SINGLE_FLIGHT_ENABLED", True)
+
+    async def run():
+        return await asyncio.gather(*(
+            rag.ask_question(request(message), FakeAsyncSession(), session) for message in messages
+        ))
+
+    responses = asyncio.run(run())
+
+    assert all(response.answer for response in responses)
+    assert llm.calls == llm_calls
+
+
+def test_kb_version_change_bypasses_the_retrieval_cache(retriever, monkeypatch):
+    session = SessionRef(1, "s-1", "u-1")
+    monkeypatch.setattr(Config, "RETRIEVAL_CACHE_ENABLED", True)
+    retrieval_cache.clear()
+    kb_version = {"value": "v1"}
+    monkeypatch.setattr(rag.services, "kb_version", lambda: kb_version["value"])
+
+    async def ask():
+        before = retriever.calls
+        await rag.ask_question(request(MESSAGES[0]), FakeAsyncSession(), session)
+        return retriever.calls - before
+
+    async def run():
+        assert await ask() == 1
+        assert await ask() == 0
+        # Re-ingestion moves the KB version on
+        kb_version["value"] = "v2"
+        assert await ask() == 1
+        assert await ask() == 0
+
+    asyncio.run(run())
+    assert retrieval_cache.invalidations >= 1
+
+
+def test_answer_cache_hit_is_classified_with_its_own_session_history(retriever, monkeypatch):
+    monkeypatch.setattr(Config, "ANSWER_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "CLASSIFIER_FAST_PATH", "on")
+    answer_cache.clear()
+
+    histories = {1: "", 2: "user: I restarted the VM but it is still not working"}
+    monkeypatch.setattr(rag, "load_chat_history", lambda db, session_id, limit=10: histories[session_id])
+    first, repeated = SessionRef(1, "s-1", "u-1"), SessionRef(2, "s-2", "u-2")
+
+    async def run():
+        fresh = await rag.ask_question(request(MESSAGES[0]), FakeAsyncSession(), first)
+        retrievals, hits = retriever.calls, answer_cache.hits
+        escalated = await rag.ask_question(request(MESSAGES[0]), FakeAsyncSession(), repeated)
+        assert (retriever.calls, answer_cache.hits) == (retrievals, hits + 1)
+        again = await rag.ask_question(request(MESSAGES[0]), FakeAsyncSession(), first)
+        return fresh, escalated, again
+
+    fresh, escalated, again = asyncio.run(run())
+
+    assert not fresh.needEscalation
+    assert escalated.needEscalation
+    assert not again.needEscalation
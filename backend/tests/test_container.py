@@ -0,0 +1,45 @@
+import asyncio
+import time
+from app.config import Config
+from app.services import ingestion
+from app.services.container import ServiceContainer
+
+
+def test_kb_version_is_refreshed_off_the_event_loop(monkeypatch):
+    resolved = []
+
+    def slow_resolve():
+        # A slow or unreachable Postgres
+        time.sleep(0.2)
+        resolved.append(time.monotonic())
+        return f"v{len(resolved)}"
+
+    monkeypatch.setattr(ingestion, "resolve_kb_version", slow_resolve)
+    monkeypatch.setattr(Config, "KB_VERSION_CHECK_SECONDS", 0.01)
+    container = ServiceContainer()
+
+    async def run():
+        refresh = asyncio.create_task(container.refresh_kb_version_periodically())
+        started = time.monotonic()
+        longest_stall = 0
+        while not resolved or time.monotonic() - started < 0.5:
+            tick = time.monotonic()
+            # Requests read the cached value without waiting for the query
+            container.kb_version()
+            await asyncio.sleep(0.005)
+            longest_stall = max(longest_stall, time.monotonic() - tick)
+        refresh.cancel()
+        return longest_stall
+
+    longest_stall = asyncio.run(run())
+
+    assert longest_stall < 0.1
+    assert container.kb_version() == f"v{len(resolved)}"
+
+
+def test_kb_version_read_does_not_query(monkeypatch):
+    def fail():
+        raise AssertionError("resolved on the request path")
+
+    monkeypatch.setattr(ingestion, "resolve_kb_version", fail)
+    assert ServiceContainer().kb_version() is None
@@ -0,0 +1,66 @@
+import time
+import pytest
+from app.services import corpus, ingestion
+from app.services.container import ServiceContainer
+from app.services.corpus import KBCorpus
+from app.services.retrieval import HybridRetriever
+
+VPN = "# VPN\n\nReconnect the wireguard client, then retry the lab login.\n"
+PRINTER = "\n# Printing\n\nRestart the spooler service on the lab host.\n"
+
+
+@pytest.fixture
+def kb(tmp_path):
+    kb_dir = tmp_path / "kb"
+    kb_dir.mkdir()
+    (kb_dir / "10-vpn.md").write_text(VPN)
+    return kb_dir
+
+
+def test_snapshot_is_reused_until_a_file_changes(kb, tmp_path):
+    snapshot = str(tmp_path / "snapshot" / "chunks.snapshot")
+    parsed = KBCorpus(str(kb), snapshot)
+    docs = parsed.documents()
+    assert parsed.source == "parsed"
+
+    loaded = KBCorpus(str(kb), snapshot)
+    assert loaded.documents() == docs
+    assert loaded.source == "snapshot"
+    assert loaded.version == parsed.version
+
+    (kb / "10-vpn.md").write_text(VPN + PRINTER)
+    changed = KBCorpus(str(kb), snapshot)
+    assert len(changed.documents()) == len(docs) + 1
+    assert changed.source == "parsed"
+    assert changed.version != parsed.version
+
+
+def test_lexical_index_follows_the_ingested_version(kb, tmp_path, monkeypatch):
+    kb_corpus = KBCorpus(str(kb), str(tmp_path / "chunks.snapshot"))
+    ingested = {"version": kb_corpus.version}
+    monkeypatch.setattr(corpus, "kb_corpus", kb_corpus)
+    monkeypatch.setattr(ingestion, "resolve_kb_version", lambda: ingested["version"])
+
+    container = ServiceContainer()
+    stale = container.lexical_index
+    container.override("retriever", HybridRetriever(lexical=stale, mode="lexical"))
+    container.refresh_kb_version()
+    assert "spooler" not in stale
+
+    # Another process re-ingests the edited KB
+    (kb / "10-vpn.md").write_text(VPN + PRINTER)
+    ingested["version"] = KBCorpus(str(kb)).version
+    assert container.refresh_kb_version() == ingested["version"]
+
+    deadline = time.monotonic() + 5
+    while container.lexical_index is stale and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert "spooler" in container.lexical_index
+    assert container.retriever.lexical is container.lexical_index
+    assert kb_corpus.version == ingested["version"]
+    assert kb_corpus.reloads == 1
+
+    # The same version does not reload again
+    container.refresh_kb_version()
+    assert kb_corpus.reloads == 1
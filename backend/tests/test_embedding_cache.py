@@ -0,0 +1,78 @@
+import asyncio
+import numpy as np
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingSegment, content_key
+from app.services.embeddings import HashingEmbeddings
+
+DIM = 8
+
+
+def vector(seed):
+    return np.random.default_rng(seed).random(DIM, dtype=np.float32).tolist()
+
+
+def items(seeds):
+    return [(content_key(str(seed)), vector(seed)) for seed in seeds]
+
+
+def test_appends_from_another_process_are_mapped_on_a_miss(tmp_path):
+    path = str(tmp_path / "queries.bin")
+    reader = EmbeddingSegment(path, DIM)
+    writer = EmbeddingSegment(path, DIM)
+
+    writer.put_many(items(range(3)))
+
+    key, expected = items([1])[0]
+    assert reader.peek(key) is None
+    assert np.allclose(reader.get(key), expected)
+    assert reader.peek(key) is not None
+
+
+def test_compaction_keeps_recently_used_rows(tmp_path):
+    path = str(tmp_path / "queries.bin")
+    segment = EmbeddingSegment(path, DIM, max_entries=8)
+    other = EmbeddingSegment(path, DIM)
+
+    segment.put_many(items(range(8)))
+    # Touch the oldest row so it survives eviction
+    assert segment.get(content_key("0")) is not None
+    segment.put_many(items([8]))
+
+    assert len(segment) == 6
+    assert segment.evictions == 3
+    assert np.allclose(segment.get(content_key("0")), vector(0))
+    assert segment.get(content_key("1")) is None
+    assert np.allclose(segment.get(content_key("8")), vector(8))
+
+    # Another process sees the rewrite by its inode change
+    assert np.allclose(other.get(content_key("8")), vector(8))
+    assert len(other) == 6
+
+
+def test_peek_does_not_wait_for_file_io(tmp_path):
+    segment = EmbeddingSegment(str(tmp_path / "queries.bin"), DIM)
+    segment.put_many(items([1]))
+
+    # Held by a refresh or compaction in progress on another thread
+    with segment._refresh_lock:
+        assert segment.peek(content_key("1")) is not None
+        assert segment.peek(content_key("2")) is None
+
+
+def test_async_writes_are_served_before_they_land(tmp_path):
+    embeddings = CachedEmbeddings(HashingEmbeddings(dim=DIM), str(tmp_path), "local", DIM)
+
+    async def run():
+        first = await embeddings.aembed_query("vpn not connecting")
+        second = await embeddings.aembed_query("vpn not connecting")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert embeddings.queries.hits == 1
+
+    embeddings.queries._writer.shutdown(wait=True)
+    assert not embeddings.queries._pending
+
+    reopened = CachedEmbeddings(HashingEmbeddings(dim=DIM), str(tmp_path), "local", DIM)
+    assert np.allclose(reopened.embed_query("vpn not connecting"), first)
+    assert reopened.queries.hits == 1
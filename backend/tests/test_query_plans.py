@@ -0,0 +1,48 @@
+from sqlalchemy import text
+from app.init_db import sessionLocal
+from app.migrations import MIGRATIONS, run_migrations
+from conftest import requires_database
+
+pytestmark = requires_database
+
+
+def test_migrations_are_recorded_and_idempotent(database):
+    assert run_migrations(database) == []
+
+    with database.connect() as conn:
+        applied = set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+        invalid = conn.execute(text(
+            "SELECT count(*) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname LIKE 'ix\\_%' AND NOT i.indisvalid"
+        )).scalar()
+
+    assert applied >= {version for version, _, _ in MIGRATIONS}
+    assert invalid == 0
+
+
+def test_interrupted_concurrent_build_is_rebuilt(database):
+    with database.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # What a CREATE INDEX CONCURRENTLY killed mid-build leaves behind
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 2"))
+        conn.execute(text("UPDATE pg_index SET indisvalid = false WHERE indexrelid = 'ix_tickets_updated_id'::regclass"))
+
+    assert run_migrations(database) == [2]
+
+    with database.connect() as conn:
+        valid = conn.execute(text(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = 'ix_tickets_updated_id'::regclass"
+        )).scalar()
+    assert valid
+
+
+def test_hot_queries_use_indexes(database):
+    from benchmarks.query_plans import plan_checks, seed
+
+    seed(sessions=20000, messages=10, reseed=False)
+
+    with sessionLocal() as db:
+        checks = plan_checks(db)
+
+    assert checks
+    regressions = [(name, seq_scans, scans) for name, _, scans, seq_scans in checks if seq_scans]
+    assert not regressions
@@ -0,0 +1,36 @@
+import pytest
+from app.services.corpus import kb_corpus
+from app.services.retrieval import BM25Index, HybridRetriever, is_exact_token, tokenize
+
+
+@pytest.mark.parametrize("token", ["ke-2001", "etc/hosts", "startup.sh", "err_conn", "e1234", "10.0.0.1", "vm:console"])
+def test_identifiers_are_exact_tokens(token):
+    assert is_exact_token(token)
+
+
+@pytest.mark.parametrize("token", ["step-by-step", "multi-user", "self-service", "browser-based", "in-vm", "2024", "vpn"])
+def test_words_are_not_exact_tokens(token):
+    assert not is_exact_token(token)
+
+
+def test_tokenize_keeps_compounds_and_parts():
+    assert tokenize("Error KE-2001 in /etc/hosts") == ["error", "ke-2001", "ke", "2001", "etc/hosts", "etc", "hosts"]
+
+
+@pytest.fixture(scope="module")
+def retriever():
+    # A stand-in vectorstore: only its presence matters to the routing decision
+    return HybridRetriever(BM25Index(kb_corpus.documents()), vectorstore=object(), mode="auto")
+
+
+def test_hyphenated_words_take_the_hybrid_route(retriever):
+    compounds = [t for t in retriever.lexical._postings if "-" in t and not any(c.isdigit() for c in t)]
+    assert compounds, "the KB should contain hyphenated words"
+    for compound in compounds:
+        assert not retriever.is_lexical_query(f"is there a {compound} guide")
+
+
+def test_known_identifiers_take_the_lexical_route(retriever):
+    identifiers = [t for t in retriever.lexical._postings if is_exact_token(t)]
+    assert identifiers
+    assert retriever.is_lexical_query(f"what does {identifiers[0]} mean")
@@ -0,0 +1,63 @@
+from langchain_core.documents import Document
+from app.services.retrieval_cache import RetrievalCache
+
+
+def doc(chunk_id):
+    return Document(page_content=f"text of {chunk_id}", metadata={"id": chunk_id, "content_hash": chunk_id})
+
+
+def test_rephrasing_reuses_the_ranked_chunks():
+    cache = RetrievalCache(max_entries=8)
+    docs = [doc("vpn#reconnect#0"), doc("vpn#intro#0")]
+    cache.store("VPN not connecting!!", "v1", docs, query_vector=[0.5, 0.5])
+
+    hit = cache.lookup("vpn  not connecting", "v1")
+    assert hit == (docs, [0.5, 0.5])
+    assert cache.hits == 1
+
+
+def test_kb_version_change_invalidates_every_entry():
+    cache = RetrievalCache(max_entries=8)
+    cache.store("vpn not connecting", "v1", [doc("vpn#reconnect#0")])
+    cache.store("dns lookup fails", "v1", [doc("dns#resolver#0")])
+
+    assert cache.lookup("vpn not connecting", "v2") is None
+    assert cache.invalidations == 1
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["chunks"] == 0
+    assert cache.stats()["kbVersion"] == "v2"
+
+    # Entries stored under the new version are served again
+    cache.store("vpn not connecting", "v2", [doc("vpn#reconnect#1")])
+    assert cache.lookup("vpn not connecting", "v2")[0][0].metadata["id"] == "vpn#reconnect#1"
+    assert cache.lookup("dns lookup fails", "v2") is None
+    assert cache.invalidations == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(max_entries=2)
+    cache.store("first", "v1", [doc("a#a#0")])
+    cache.store("second", "v1", [doc("b#b#0")])
+    assert cache.lookup("first", "v1")
+    cache.store("third", "v1", [doc("c#c#0")])
+
+    assert cache.lookup("second", "v1") is None
+    assert cache.lookup("first", "v1")
+    assert cache.evictions == 1
+
+
+def test_stopwords_are_ignored_only_when_enabled():
+    cache = RetrievalCache(max_entries=8, drop_stopwords=True)
+    cache.store("how do I reset my password", "v1", [doc("auth#reset#0")])
+    assert cache.lookup("reset password", "v1")
+
+    cache = RetrievalCache(max_entries=8)
+    cache.store("how do I reset my password", "v1", [doc("auth#reset#0")])
+    assert cache.lookup("reset password", "v1") is None
+
+
+def test_query_without_text_is_not_cached():
+    cache = RetrievalCache(max_entries=8)
+    cache.store("?!", "v1", [doc("a#a#0")])
+    assert cache.lookup("?!", "v1") is None
+    assert cache.stats()["entries"] == 0
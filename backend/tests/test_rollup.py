@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+from sqlalchemy import select, text
+from app.init_db import sessionLocal
+from app.migrations import run_migrations
+from app.models.db import (
+    ChatMessages, ChatSessions, GuardRails, KBReferences, MessageRole, MetricsDaily,
+    Severity, Ticket, TicketStatus, Tier, User, UserRole,
+)
+from app.services.memory import get_or_create_session
+from app.services.rollup import ensure_rollup, live_counters, rebuild_rollup, rollup_counters
+from conftest import requires_database
+
+pytestmark = requires_database
+
+USER_ID = "rollup-test-user"
+# A day no other test writes to
+DAY = datetime(2031, 5, 4, 9, 30)
+
+
+def day_counters(db, day):
+    rows = db.execute(select(MetricsDaily.metric, MetricsDaily.value).where(MetricsDaily.day == day)).all()
+    return {metric: value for metric, value in rows if value}
+
+
+def remove_test_rows(db):
+    # Bulk deletes bypass after_flush, so the rollup is rebuilt afterwards
+    session_ids = select(ChatSessions.id).where(ChatSessions.user_id == USER_ID)
+    for model in (GuardRails, KBReferences, Ticket, ChatMessages):
+        db.query(model).filter(model.session_id.in_(session_ids)).delete(synchronize_session=False)
+    db.query(ChatSessions).filter(ChatSessions.user_id == USER_ID).delete(synchronize_session=False)
+    db.commit()
+
+
+@pytest.fixture
+def db(database):
+    with sessionLocal() as db:
+        remove_test_rows(db)
+        db.merge(User(id=USER_ID, username=USER_ID, password_hash="x", role=UserRole.Trainee))
+        db.commit()
+        rebuild_rollup(db)
+
+        yield db
+
+        db.rollback()
+        remove_test_rows(db)
+        rebuild_rollup(db)
+
+
+def assert_rollup_matches_base_tables(db):
+    live, rolled = live_counters(db), rollup_counters(db)
+    for name in set(live) | set(rolled):
+        assert float(live.get(name) or 0) == pytest.approx(float(rolled.get(name) or 0)), name
+
+
+def test_orm_writes_move_the_daily_counters(db):
+    session = ChatSessions(
+        session_id="rollup-1", user_id=USER_ID, user_role=UserRole.Trainee, context={}, created_at=DAY,
+    )
+    db.add(session)
+    db.flush()
+
+    question = ChatMessages(session_id=session.id, role=MessageRole.user, content="vpn down", created_at=DAY)
+    answer = ChatMessages(
+        session_id=session.id, role=MessageRole.assistant, content="reconnect", confidence=0.75,
+        need_escalation=True, created_at=DAY,
+    )
+    db.add_all([question, answer])
+    db.flush()
+
+    db.add(GuardRails(session_id=session.id, message_id=question.id, blocked=True, reason="test", created_at=DAY))
+    first, second = (
+        Ticket(id=f"rollup-{n}", session_id=session.id, tier=tier, severity=severity,
+               user_role=UserRole.Trainee, ai_results={}, created_at=DAY)
+        for n, tier, severity in ((1, Tier.TIER_1, Severity.LOW), (2, Tier.TIER_2, Severity.HIGH))
+    )
+    db.add_all([first, second])
+    db.commit()
+
+    assert day_counters(db, DAY.date()) == {
+        "sessions": 1,
+        "sessions.ticketed": 1,
+        "messages": 2,
+        "messages.escalation": 1,
+        "assistant.confidence_sum": 0.75,
+        "assistant.confidence_count": 1,
+        "guardrail.events": 1,
+        "guardrail.blocked": 1,
+        "tickets": 2,
+        "tickets.status.OPEN": 2,
+        "tickets.tier.TIER_1": 1,
+        "tickets.tier.TIER_2": 1,
+        "tickets.severity.LOW": 1,
+        "tickets.severity.HIGH": 1,
+    }
+
+    # An edit moves the ticket between counters on its creation day
+    first.status = TicketStatus.RESOLVED
+    db.commit()
+    counters = day_counters(db, DAY.date())
+    assert counters["tickets.status.OPEN"] == 1
+    assert counters["tickets.status.RESOLVED"] == 1
+
+    db.delete(second)
+    db.commit()
+    counters = day_counters(db, DAY.date())
+    assert counters["tickets"] == 1
+    assert "tickets.tier.TIER_2" not in counters
+    assert counters["sessions.ticketed"] == 1
+
+    # The session's last ticket takes it off the ticketed count
+    db.delete(first)
+    db.commit()
+    counters = day_counters(db, DAY.date())
+    assert "tickets" not in counters
+    assert "sessions.ticketed" not in counters
+
+    assert_rollup_matches_base_tables(db)
+
+
+def test_upserted_session_is_counted_once(db):
+    today = datetime.utcnow().date()
+    before = day_counters(db, today).get("sessions", 0)
+
+    created = get_or_create_session(db, "rollup-2", USER_ID, UserRole.Trainee, {})
+    again = get_or_create_session(db, "rollup-2", USER_ID, UserRole.Trainee, {})
+
+    assert created.created and not again.created
+    assert day_counters(db, today).get("sessions", 0) == before + 1
+    assert_rollup_matches_base_tables(db)
+
+
+def add_session_with_ticket(db, n):
+    session = ChatSessions(
+        session_id=f"rollup-{n}", user_id=USER_ID, user_role=UserRole.Trainee, context={}, created_at=DAY,
+    )
+    db.add(session)
+    db.flush()
+    db.add(Ticket(id=f"rollup-{n}", session_id=session.id, tier=Tier.TIER_1, severity=Severity.LOW,
+                  user_role=UserRole.Trainee, ai_results={}, created_at=DAY))
+    db.commit()
+
+
+def test_backfill_runs_once_when_workers_start_together(db, database):
+    add_session_with_ticket(db, 3)
+    with database.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # A first deploy over existing rows
+        conn.execute(text("DELETE FROM metrics_daily"))
+        conn.execute(text("DELETE FROM schema_migrations WHERE version = 3"))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        applied = list(pool.map(lambda _: run_migrations(database), range(4)))
+
+    assert sorted(applied) == [[], [], [], [3]]
+    assert day_counters(db, DAY.date())["tickets"] == 1
+    assert_rollup_matches_base_tables(db)
+
+
+def test_backfill_leaves_a_populated_rollup_alone(db, database):
+    add_session_with_ticket(db, 4)
+    with database.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("DELETE FROM metrics_daily"))
+        assert ensure_rollup(conn)
+        assert not ensure_rollup(conn)
+
+    assert day_counters(db, DAY.date())["sessions"] == 1
+    assert_rollup_matches_base_tables(db)
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from app.services.retrieval_cache import normalize_query
+from app.services.single_flight import SingleFlight, message_key
+
+
+@pytest.mark.parametrize("first, second", [
+    ("VPN not connecting!!", "vpn  not connecting"),
+    ("KE-2001 on startup.sh", "ke-2001 on startup.sh?"),
+])
+def test_rephrasings_share_a_normalized_query(first, second):
+    assert normalize_query(first) == normalize_query(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("C++ build fails", "C# build fails"),
+    ("Café wifi drops", "Caf wifi drops"),
+    ("登录失败", "ログインできない"),
+])
+def test_normalization_keeps_what_the_token_pattern_would_drop(first, second):
+    assert normalize_query(first) != normalize_query(second)
+    assert normalize_query(first)
+
+
+def test_message_key_only_ignores_case_and_whitespace():
+    assert message_key("  VPN\tnot   connecting ") == message_key("vpn not connecting")
+    assert message_key("C++ build fails") != message_key("C# build fails")
+    assert message_key("Café wifi") == "café wifi"
+    assert message_key("vpn not connecting!") != message_key("vpn not connecting")
+
+
+def run_concurrently(flights, keys, delay=0.05):
+    calls = []
+
+    async def call(key):
+        calls.append(key)
+        await asyncio.sleep(delay)
+        return key
+
+    async def run():
+        return await asyncio.gather(*(flights.run("rag", key, lambda key=key: call(key)) for key in keys))
+
+    return asyncio.run(run()), calls
+
+
+def test_identical_keys_share_one_call():
+    flights = SingleFlight(max_waiters=8, timeout_seconds=5)
+    results, calls = run_concurrently(flights, [message_key("VPN down"), message_key("vpn  down"), message_key("C# down")])
+
+    assert results == ["vpn down", "vpn down", "c# down"]
+    assert sorted(calls) == ["c# down", "vpn down"]
+    assert flights.stats()["chains"]["rag"] == {"calls": 2, "coalesced": 1}
+    assert flights.stats()["inFlight"] == 0
+
+
+def test_waiters_beyond_the_limit_make_their_own_call():
+    flights = SingleFlight(max_waiters=1, timeout_seconds=5)
+    _, calls = run_concurrently(flights, ["same"] * 3)
+
+    assert len(calls) == 2
+    assert flights.stats()["chains"]["rag"] == {"calls": 1, "coalesced": 1, "overflow": 1}
+
+
+def test_a_slow_call_is_not_waited_on_past_the_timeout():
+    flights = SingleFlight(max_waiters=8, timeout_seconds=0.01)
+    _, calls = run_concurrently(flights, ["same"] * 2, delay=0.1)
+
+    assert len(calls) == 2
+    assert flights.stats()["chains"]["rag"]["timeouts"] == 1
+
+
+def test_errors_are_shared_with_waiters():
+    flights = SingleFlight(max_waiters=8, timeout_seconds=5)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("llm unavailable")
+
+    async def run():
+        return await asyncio.gather(*(flights.run("rag", "same", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flights.stats()["chains"]["rag"] == {"calls": 1, "coalesced": 2}
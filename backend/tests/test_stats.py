@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from pathlib import Path
+from app.services.stats import LatencyStats, TokenStats
+
+
+def test_latency_percentiles_and_routes():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.observe("total", ms / 1000)
+    stats.route("hybrid")
+
+    assert stats.stats() == {
+        "routes": {"hybrid": 1},
+        "stages": {"total": {"count": 100, "p50Ms": 51.0, "p95Ms": 96.0}},
+    }
+
+
+def test_token_totals_include_dropped_counts():
+    stats = TokenStats(budget=100)
+    stats.observe("context", 40)
+    stats.observe("context", 60)
+    stats.count({"droppedDuplicate": 2})
+
+    result = stats.stats()
+    assert result["budget"] == 100
+    assert result["tokens"]["context"] == {"count": 2, "mean": 50.0, "p50": 60, "p95": 60, "max": 60}
+    assert result["totals"] == {"context": 100, "droppedDuplicate": 2}
+
+
+def test_password_workers_do_not_load_the_retrieval_stack():
+    # Spawned workers import app.administration.security to unpickle the hash functions
+    code = (
+        "import sys, app.administration.security; "
+        "print(sorted(m for m in ('numpy', 'langchain_core', 'app.services.retrieval') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).resolve().parents[1],
+    )
+    assert result.stdout.strip() == "[]"
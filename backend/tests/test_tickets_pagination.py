@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.administration.dependencies import get_current_user
+from app.init_db import sessionLocal
+from app.models.db import ChatSessions, Ticket, User, UserRole
+from app.routes import tickets
+from app.services.pagination import decode_cursor, encode_cursor
+from conftest import requires_database
+
+USER_ID = "pagination-test-user"
+
+
+@pytest.mark.parametrize("value", [datetime(2026, 3, 1, 12, 30, 15, 123456), None])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor("-created_at", value, "ticket-7")
+    assert decode_cursor(cursor, "-created_at") == (value, "ticket-7")
+
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor("-created_at", datetime(2026, 3, 1), "ticket-7")
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "updated_at")
+    assert error.value.status_code == 400
+
+
+# Not base64 JSON, then "{}" and "[]" encoded
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "W10"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "-created_at")
+    assert error.value.status_code == 400
+
+
+def tickets_app():
+    app = FastAPI()
+    app.include_router(tickets.router)
+    app.dependency_overrides[get_current_user] = lambda: {"role": "instructor", "user_id": USER_ID}
+    return app
+
+
+def test_openapi_describes_the_projected_list():
+    operation = TestClient(tickets_app()).get("/openapi.json").json()["paths"]["/api/tickets"]["get"]
+    response = operation["responses"]["200"]
+
+    assert response["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/TicketListItem")
+    assert set(response["headers"]) == {"X-Next-Cursor", "Link"}
+
+    limit = next(p for p in operation["parameters"] if p["name"] == "limit")["schema"]
+    assert limit["default"] == tickets.DEFAULT_PAGE_SIZE
+    assert limit["maximum"] == tickets.MAX_PAGE_SIZE
+
+
+@pytest.fixture
+def client(database):
+    started = datetime(2026, 1, 1)
+
+    with sessionLocal() as db:
+        db.query(Ticket).filter(Ticket.id.like("pagination-%")).delete(synchronize_session=False)
+        db.query(ChatSessions).filter(ChatSessions.user_id == USER_ID).delete(synchronize_session=False)
+        db.merge(User(id=USER_ID, username=USER_ID, password_hash="x", role=UserRole.Instructor))
+        session = ChatSessions(session_id=USER_ID, user_id=USER_ID, user_role=UserRole.Instructor, context={})
+        db.add(session)
+        db.flush()
+
+        for i in range(11):
+            # Duplicate timestamps exercise the id tie-break, the last two the NULL placement
+            created = None if i >= 9 else started + timedelta(hours=i // 2)
+            db.add(Ticket(
+                id=f"pagination-{i:02d}", session_id=session.id, tier="TIER_1", severity="LOW",
+                status="OPEN", user_role=UserRole.Instructor, ai_results={}, created_at=created,
+            ))
+        db.commit()
+        # Column defaults do not apply to an explicit NULL
+        db.query(Ticket).filter(Ticket.id.in_(["pagination-09", "pagination-10"])).update(
+            {Ticket.created_at: None}, synchronize_session=False,
+        )
+        db.commit()
+
+    yield TestClient(tickets_app())
+
+    with sessionLocal() as db:
+        db.query(Ticket).filter(Ticket.id.like("pagination-%")).delete(synchronize_session=False)
+        db.query(ChatSessions).filter(ChatSessions.user_id == USER_ID).delete(synchronize_session=False)
+        db.commit()
+
+
+@requires_database
+def test_without_limit_one_default_page_is_returned(client):
+    with sessionLocal() as db:
+        session_id = db.query(ChatSessions.id).filter(ChatSessions.user_id == USER_ID).scalar()
+        db.add_all(
+            Ticket(id=f"pagination-extra-{i:03d}", session_id=session_id, tier="TIER_1", severity="LOW",
+                   status="OPEN", user_role=UserRole.Instructor, ai_results={})
+            for i in range(tickets.DEFAULT_PAGE_SIZE)
+        )
+        db.commit()
+
+    response = client.get("/api/tickets", params={"fields": "id"})
+
+    assert response.status_code == 200
+    assert len(response.json()) == tickets.DEFAULT_PAGE_SIZE
+    assert response.headers["x-next-cursor"]
+
+    rest = client.get("/api/tickets", params={"fields": "id", "cursor": response.headers["x-next-cursor"]})
+    assert len(rest.json()) == 11
+    assert "x-next-cursor" not in rest.headers
+
+
+@requires_database
+def test_page_size_is_capped(client):
+    response = client.get("/api/tickets", params={"limit": tickets.MAX_PAGE_SIZE + 1})
+    assert response.status_code == 422
+
+
+@requires_database
+@pytest.mark.parametrize("sort", ["-created_at", "created_at"])
+def test_pages_follow_the_cursor(client, sort):
+    expected = [t["id"] for t in client.get("/api/tickets", params={"sort": sort, "fields": "id", "limit": 20}).json()]
+
+    seen = []
+    params = {"sort": sort, "fields": "id,created_at", "limit": 3}
+    while True:
+        response = client.get("/api/tickets", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        assert all(set(ticket) == {"id", "created_at"} for ticket in page)
+        seen.extend(ticket["id"] for ticket in page)
+
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in response.headers["link"]
+        params["cursor"] = cursor
+
+    assert seen == expected
+    assert len(seen) == 11
+
+    nulls = ["pagination-10", "pagination-09"] if sort.startswith("-") else ["pagination-09", "pagination-10"]
+    assert (seen[:2] if sort.startswith("-") else seen[-2:]) == nulls
+
@@ -13,7 +13,7 @@ import CloseIcon from '@mui/icons-material/Close';
 import EditIcon from '@mui/icons-material/Edit';
 import DeleteIcon from '@mui/icons-material/Delete';
 import SaveIcon from '@mui/icons-material/Save';
-import { fetchTickets, updateTicket, deleteTicket } from '../routes/ticketService';
+import { fetchTicketPage, updateTicket, deleteTicket } from '../routes/ticketService';
 import { useAuth } from '../context/AuthContext';
 
 const TicketDashboard = () => {
@@ -24,6 +24,8 @@ const TicketDashboard = () => {
   const [tickets, setTickets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Modal state
   const [selectedTicket, setSelectedTicket] = useState(null);
@@ -40,8 +42,9 @@ const TicketDashboard = () => {
     try {
       setLoading(true);
       setError(null);
-      const data = await fetchTickets();
-      setTickets(data);
+      const page = await fetchTicketPage();
+      setTickets(page.tickets);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Failed to fetch tickets:', err);
       setError('Failed to load tickets. Please try again.');
@@ -50,6 +53,22 @@ const TicketDashboard = () => {
     }
   };
 
+  // Next page only when asked for, so the dashboard never drains the whole table
+  const loadMoreTickets = async () => {
+    try {
+      setLoadingMore(true);
+      setError(null);
+      const page = await fetchTicketPage(nextCursor);
+      setTickets((loaded) => [...loaded, ...page.tickets]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Failed to fetch tickets:', err);
+      setError('Failed to load more tickets. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => { loadTickets(); }, []);
 
   // ── Role-based permissions ──────────────────────────────────────────────────
@@ -81,12 +100,13 @@ const TicketDashboard = () => {
     try {
       setUpdating(true);
       setUpdateError(null);
-      await updateTicket(selectedTicket.id, {
+      const updated = await updateTicket(selectedTicket.id, {
         status: editStatus,
         tier: editTier,
         severity: editSeverity,
       });
-      await loadTickets();
+      // Patched in place, so the pages already loaded stay loaded
+      setTickets((loaded) => loaded.map((t) => (t.id === updated.id ? { ...t, ...updated } : t)));
       handleCloseModal();
     } catch (err) {
       setUpdateError(err.response?.data?.detail || 'Update failed. Please try again.');
@@ -101,7 +121,7 @@ const TicketDashboard = () => {
       setDeleting(true);
       setUpdateError(null);
       await deleteTicket(selectedTicket.id);
-      await loadTickets();
+      setTickets((loaded) => loaded.filter((t) => t.id !== selectedTicket.id));
       handleCloseModal();
     } catch (err) {
       setUpdateError(err.response?.data?.detail || 'Delete failed. Please try again.');
@@ -185,7 +205,7 @@ const TicketDashboard = () => {
           <Grid item xs={12} sm={6} md={3}>
             <Paper sx={{ p: 2, backgroundColor: '#1a1a1a', borderLeft: '4px solid #D4AF37' }}>
               <Typography variant="caption" sx={{ color: '#999999' }}>Total Tickets</Typography>
-              <Typography variant="h5" sx={{ color: '#D4AF37', fontWeight: 'bold' }}>{loading ? '—' : totalTickets}</Typography>
+              <Typography variant="h5" sx={{ color: '#D4AF37', fontWeight: 'bold' }}>{loading ? '—' : `${totalTickets}${nextCursor ? '+' : ''}`}</Typography>
             </Paper>
           </Grid>
           <Grid item xs={12} sm={6} md={3}>
@@ -213,6 +233,11 @@ const TicketDashboard = () => {
             </Paper>
           </Grid>
         </Grid>
+        {nextCursor && !loading && (
+          <Typography variant="caption" sx={{ color: '#999999', display: 'block', mt: 2 }}>
+            Statistics cover the {totalTickets} most recent tickets loaded so far.
+          </Typography>
+        )}
       </Paper>
 
       {/* Filters */}
@@ -303,6 +328,16 @@ const TicketDashboard = () => {
         </TableContainer>
       )}
 
+      {/* Pagination */}
+      {!loading && nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button onClick={loadMoreTickets} disabled={loadingMore} variant="outlined"
+            sx={{ color: '#D4AF37', borderColor: '#D4AF37', '&:hover': { borderColor: '#E8C547' } }}>
+            {loadingMore ? 'Loading...' : 'Load more tickets'}
+          </Button>
+        </Box>
+      )}
+
       {/* Footer */}
       <Box sx={{ mt: 3, p: 2, backgroundColor: '#242424', borderRadius: '8px', border: '1px solid #333333' }}>
         <Typography variant="caption" sx={{ color: '#999999' }}>
@@ -2,6 +2,9 @@ import apiClient from './apiService';
 
 const getAuth = () => JSON.parse(localStorage.getItem("pcte_user") || "{}");
 
+// Tickets per dashboard page (GET /api/tickets serves at most 500)
+const TICKET_PAGE_SIZE = 100;
+
 export const createSupportTicket = async (ticketData) => {
     try {
         const auth = getAuth();
@@ -17,9 +20,9 @@ export const createSupportTicket = async (ticketData) => {
     }
 };
 
-export const fetchTickets = async () => {
+export const fetchTickets = async (params = {}) => {
     try {
-        const response = await apiClient.get('/api/tickets');
+        const response = await apiClient.get('/api/tickets', { params });
         return response.data;
     } catch (error) {
         console.error("Error fetching tickets:", error);
@@ -27,6 +30,19 @@ export const fetchTickets = async () => {
     }
 };
 
+// One page of tickets; pass the returned nextCursor back to get the following page
+export const fetchTicketPage = async (cursor = null, params = {}) => {
+    try {
+        const response = await apiClient.get('/api/tickets', {
+            params: { ...params, limit: TICKET_PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+        });
+        return { tickets: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+    } catch (error) {
+        console.error("Error fetching tickets:", error);
+        throw error;
+    }
+};
+
 export const fetchTicketDetails = async (ticketId) => {
     try {
         const response = await apiClient.get(`/api/tickets/${ticketId}`);